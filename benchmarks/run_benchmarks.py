@@ -0,0 +1,189 @@
+"""
+Time and peak-memory benchmarks for SAV loading, matching and recoding.
+
+Usage:
+    python -m benchmarks.run_benchmarks --variables 100 1000 5000 --rows 500 10000
+    python -m benchmarks.run_benchmarks --variables 2000 --rows 1000000 --keep-files
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, NamedTuple
+
+from benchmarks.synthetic_sav import generate_survey_sav, SyntheticSurvey
+from src.backend.sav.spss_match_processor import SPSSMatchProcessor
+from src.backend.sav.match_cache import MatchCache
+from src.backend.sav.sav_export import recoded_sav_bytes
+from src.frontend.Components.Outputs.correlation_excel import (
+    apply_recodes,
+    build_correlation_table,
+    _write_styled_excel
+)
+
+
+class StageResult(NamedTuple):
+    """Timing for one pipeline stage on one synthetic file"""
+    stage: str
+    seconds: float
+    peak_mb: float | None  # Peak traced allocation during the stage, None if not measured
+
+
+def _measure(stage: str, func: Callable, trace_memory: bool):
+    """
+    Run func, returning (its result, StageResult).
+
+    tracemalloc slows allocation-heavy code several times over, so the stage
+    is timed untraced first and then run a second time under tracemalloc to
+    get the peak memory figure.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+
+    peak_mb = None
+    if trace_memory:
+        del result
+        gc.collect()
+        tracemalloc.start()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_mb = peak / 1024 ** 2
+
+    return result, StageResult(stage, seconds, peak_mb)
+
+
+def benchmark_survey(survey: SyntheticSurvey, trace_memory: bool = True) -> list[StageResult]:
+    """
+    Run every pipeline stage against one synthetic SAV file.
+
+    Stages mirror what one Streamlit session does: load the SAV, list the
+    general questions, match every highlighted statement, apply the recodes,
+    correlate them, write the Excel file and export the recoded SAV.
+
+    Args:
+        survey: Generated file to benchmark
+        trace_memory: Also run each stage under tracemalloc for peak memory
+    """
+    results = []
+
+    essentials, stage = _measure(
+        "get_essentials_from_sav",
+        lambda: SPSSMatchProcessor.get_essentials_from_sav(survey.path, "Plaintiff", "Defense"),
+        trace_memory
+    )
+    results.append(stage)
+    catalog = essentials['catalog']
+
+    # In-memory cache, emptied before each matching stage so the matcher itself is timed
+    match_cache = MatchCache()
+
+    def uncached(func: Callable) -> Callable:
+        def run():
+            match_cache.clear()
+            return func()
+        return run
+
+    processor, stage = _measure(
+        "SPSSMatchProcessor.__init__",
+        lambda: SPSSMatchProcessor(catalog, "Plaintiff", "Defense", match_cache),
+        trace_memory
+    )
+    results.append(stage)
+
+    _, stage = _measure("get_all_general_questions", processor.get_all_general_questions, trace_memory)
+    results.append(stage)
+
+    statements = survey.name1_statements + survey.name2_statements
+    _, stage = _measure(
+        f"_find_column x{len(statements)}",
+        uncached(lambda: [processor._find_column(statement) for statement in statements]),
+        trace_memory
+    )
+    results.append(stage)
+
+    _, stage = _measure(
+        f"match_many x{len(statements)}",
+        uncached(lambda: processor.match_many(statements)),
+        trace_memory
+    )
+    results.append(stage)
+
+    _, stage = _measure(
+        f"match_many x{len(statements)} (cached)",
+        lambda: processor.match_many(statements),
+        trace_memory
+    )
+    results.append(stage)
+
+    (recoded_df, _), stage = _measure(
+        f"apply_recodes x{len(survey.recode_settings)}",
+        lambda: apply_recodes(catalog.df, survey.recode_settings),
+        trace_memory
+    )
+    results.append(stage)
+
+    corr_matrix, stage = _measure(
+        "build_correlation_table",
+        lambda: build_correlation_table(recoded_df, survey.recode_settings),
+        trace_memory
+    )
+    results.append(stage)
+
+    _, stage = _measure("_write_styled_excel", lambda: _write_styled_excel(corr_matrix), trace_memory)
+    results.append(stage)
+
+    _, stage = _measure(
+        "recoded_sav_bytes",
+        lambda: recoded_sav_bytes(catalog, recoded_df, survey.recode_settings, "Plaintiff", "Defense"),
+        trace_memory
+    )
+    results.append(stage)
+
+    return results
+
+
+def _print_results(survey: SyntheticSurvey, results: list[StageResult]) -> None:
+    print(f"\n=== {survey.n_variables} variables x {survey.n_rows} rows ===")
+    print(f"{'stage':<40}{'seconds':>10}{'peak MB':>12}")
+    for result in results:
+        peak = f"{result.peak_mb:>12.1f}" if result.peak_mb is not None else f"{'-':>12}"
+        print(f"{result.stage:<40}{result.seconds:>10.3f}{peak}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--variables", type=int, nargs="+", default=[100, 1000, 5000],
+                        help="Variable counts to generate (100 to 5,000)")
+    parser.add_argument("--rows", type=int, nargs="+", default=[500, 10000],
+                        help="Respondent counts to generate (500 to 1,000,000)")
+    parser.add_argument("--missing-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep-files", action="store_true", help="Keep generated .sav files")
+    parser.add_argument("--skip-memory", action="store_true",
+                        help="Only time each stage (skips the second, tracemalloc-traced run)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_variables in args.variables:
+            for n_rows in args.rows:
+                path = os.path.join(
+                    os.getcwd() if args.keep_files else tmp_dir,
+                    f"synthetic_{n_variables}v_{n_rows}r.sav"
+                )
+                survey = generate_survey_sav(
+                    path,
+                    n_variables=n_variables,
+                    n_rows=n_rows,
+                    missing_rate=args.missing_rate,
+                    seed=args.seed
+                )
+                _print_results(survey, benchmark_survey(survey, trace_memory=not args.skip_memory))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Generate realistic synthetic survey SAV files for benchmarking"""
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+import pyreadstat
+
+
+LIKERT_7 = {
+    1.0: "Strongly agree", 2.0: "Agree", 3.0: "Somewhat agree", 4.0: "Neither agree nor disagree",
+    5.0: "Somewhat disagree", 6.0: "Disagree", 7.0: "Strongly disagree"
+}
+LIKERT_4 = {1.0: "Strongly agree", 2.0: "Agree", 3.0: "Disagree", 4.0: "Strongly disagree"}
+YES_NO = {1.0: "Yes", 2.0: "No"}
+
+METADATA_COLUMNS = [
+    ("firstname", "First name"),
+    ("lastname", "Last name"),
+    ("email", "Please enter your email address"),
+    ("j_number", "Juror number"),
+]
+
+SUBJECTS = [
+    "the defendant", "the plaintiff", "the company", "the driver", "the manufacturer",
+    "the hospital", "the landlord", "the contractor", "the insurer", "the employer"
+]
+VERBS = [
+    "acted negligently toward", "misled", "failed to warn", "ignored safety complaints from",
+    "breached its contract with", "concealed test results from", "retaliated against",
+    "was honest with", "followed industry standards when dealing with", "caused harm to"
+]
+OBJECTS = [
+    "its customers", "the injured worker", "the tenants", "the patients", "the public",
+    "the regulators", "the distributor", "the family", "its own employees", "the community"
+]
+QUALIFIERS = [
+    "before the incident", "after the recall", "during the negotiations", "in the emails shown",
+    "despite repeated warnings", "according to the expert", "over several years", "at every stage"
+]
+
+
+class SyntheticSurvey(NamedTuple):
+    """A generated SAV file plus the inputs needed to exercise the pipeline"""
+    path: str
+    n_rows: int
+    n_variables: int
+    name1_statements: list[str]  # Highlighted statements for party 1 (some shortened to force partial matches)
+    name2_statements: list[str]  # Highlighted statements for party 2
+    recode_settings: dict[str, dict]  # recode_settings as the UI would build them
+
+
+def _statement(rng: np.random.Generator, number: int) -> str:
+    """A plausible argument statement; the trailing number keeps labels unique"""
+    return (
+        f"{rng.choice(SUBJECTS).capitalize()} {rng.choice(VERBS)} {rng.choice(OBJECTS)} "
+        f"{rng.choice(QUALIFIERS)} (item {number})."
+    )
+
+
+def _responses(rng: np.random.Generator, n_rows: int, codes: list[float], missing_rate: float) -> np.ndarray:
+    values = rng.choice(np.asarray(codes, dtype=float), size=n_rows)
+    values[rng.random(n_rows) < missing_rate] = np.nan
+    return values
+
+
+def generate_survey_sav(
+    path: str,
+    n_variables: int = 500,
+    n_rows: int = 1000,
+    party_prefixes: tuple[str, str] = ("Plaaffs", "Defaffs"),
+    party_fraction: float = 0.3,
+    recoded_fraction: float = 0.2,
+    missing_rate: float = 0.05,
+    seed: int = 0
+) -> SyntheticSurvey:
+    """
+    Write a synthetic survey SAV file shaped like our trial-research instruments.
+
+    Layout (in column order): metadata fields, general questions (7-point Likert,
+    yes/no, continuous and free text), then party-prefixed argument questions
+    on a 4-point scale. Some yes/no questions have no missing responses. A
+    fraction of party questions also get a `.r` recoded
+    copy with the same label, the way a previously run syntax file leaves them.
+
+    Args:
+        path: Where to write the .sav file
+        n_variables: Approximate total number of variables (100 to 5,000)
+        n_rows: Number of respondents (500 to 1,000,000)
+        party_prefixes: Column-name prefixes for the two parties' questions
+        party_fraction: Share of variables that are party argument questions
+        recoded_fraction: Share of party questions that also have a `.r` copy
+        missing_rate: Share of responses left system-missing
+        seed: Random seed for reproducible files
+
+    Returns:
+        SyntheticSurvey with the path, highlighted statements and recode settings
+    """
+    rng = np.random.default_rng(seed)
+    data: dict[str, object] = {}
+    labels: dict[str, str] = {}
+    value_labels: dict[str, dict] = {}
+
+    for column, label in METADATA_COLUMNS:
+        if column == "j_number":
+            data[column] = np.arange(1, n_rows + 1, dtype=float)
+        else:
+            data[column] = np.full(n_rows, f"{column}_value", dtype=object)
+        labels[column] = label
+
+    n_party = max(2, int(n_variables * party_fraction))
+    n_general = max(1, n_variables - n_party - len(METADATA_COLUMNS))
+    question_number = 0
+
+    for i in range(1, n_general + 1):
+        question_number += 1
+        column = f"Q{i}"
+        kind = i % 10
+        if kind == 0:
+            data[column] = np.where(rng.random(n_rows) < missing_rate, np.nan, rng.normal(45, 15, n_rows).round())
+            labels[column] = f"What is your age? (item {question_number})"
+        elif kind == 1:
+            data[column] = rng.choice(np.array(["comment", "", "n/a"], dtype=object), size=n_rows)
+            labels[column] = f"Any other comments? (item {question_number})"
+        elif kind in (2, 3):
+            # kind 3 is a screening question every respondent answers (no SYSMIS),
+            # which compaction stores as plain int8 rather than nullable Int8
+            data[column] = _responses(rng, n_rows, list(YES_NO), missing_rate if kind == 2 else 0.0)
+            labels[column] = f"Have you ever served on a jury before? (item {question_number})"
+            value_labels[column] = YES_NO
+        else:
+            data[column] = _responses(rng, n_rows, list(LIKERT_7), missing_rate)
+            labels[column] = _statement(rng, question_number)
+            value_labels[column] = LIKERT_7
+
+    name1_statements: list[str] = []
+    name2_statements: list[str] = []
+    recode_settings: dict[str, dict] = {}
+
+    for i in range(1, n_party + 1):
+        question_number += 1
+        prefix = party_prefixes[0] if i <= n_party // 2 else party_prefixes[1]
+        column = f"{prefix}Q{i}"
+        label = _statement(rng, question_number)
+        data[column] = _responses(rng, n_rows, list(LIKERT_4), missing_rate)
+        labels[column] = label
+        value_labels[column] = LIKERT_4
+
+        if rng.random() < recoded_fraction:
+            data[f"{column}.r"] = _responses(rng, n_rows, [1.0, 2.0], missing_rate)
+            labels[f"{column}.r"] = label
+            value_labels[f"{column}.r"] = {1.0: "Plaintiff", 2.0: "Defense"}
+
+        # PDF highlights are sometimes cut short or have doubled spaces
+        if i % 5 == 0:
+            statement = label.split(" (item")[0]
+        elif i % 7 == 0:
+            statement = label.replace(" ", "  ", 2)
+        else:
+            statement = label
+
+        if prefix == party_prefixes[0]:
+            name1_statements.append(statement)
+            favorable, unfavorable = 2, 1
+        else:
+            name2_statements.append(statement)
+            favorable, unfavorable = 1, 2
+        recode_settings[statement] = {
+            'party': 'name1' if prefix == party_prefixes[0] else 'name2',
+            'matched_column': column,
+            'sysmis_becomes': None,
+            'variable_type': 'categorical',
+            'range1_start': 1.0,
+            'range1_end': 2.0,
+            'range1_becomes': favorable,
+            'range2_start': 3.0,
+            'range2_end': 4.0,
+            'range2_becomes': unfavorable
+        }
+
+    df = pd.DataFrame(data)
+    pyreadstat.write_sav(df, path, column_labels=labels, variable_value_labels=value_labels)
+
+    return SyntheticSurvey(
+        path=path,
+        n_rows=n_rows,
+        n_variables=df.shape[1],
+        name1_statements=name1_statements,
+        name2_statements=name2_statements,
+        recode_settings=recode_settings
+    )
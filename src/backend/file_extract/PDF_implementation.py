@@ -4,6 +4,7 @@ import fitz  # PyMuPDF for handling highlights
 import io
 from abc import ABC, abstractmethod
 from .PDF_abstract import PDFProcessor
+from ..text_canonical import canonicalize
 import tempfile
 import os
 class PDFHandler1(PDFProcessor):
@@ -215,8 +216,8 @@ class PDFHandler1(PDFProcessor):
     
     def _clean_and_split_statements(self, highlights) -> list[str]:
         """Clean text and split into individual statements"""
-        # Combine all text into one string
-        combined_text = ' '.join([h['text'] for h in highlights])
+        # Combine all text into one string, in the canonical form SAV labels are matched in
+        combined_text = canonicalize(' '.join([h['text'] for h in highlights]))
         
         # Remove statistics patterns
         combined_text = re.sub(r'\d+\.\d+\s+(?:\d+\s*%\s*)+', '', combined_text)
@@ -0,0 +1,76 @@
+"""Aho–Corasick automaton for finding many patterns in one pass over a text"""
+from collections import deque
+from typing import Iterator
+
+
+class AhoCorasick:
+    """
+    Multi-pattern substring matcher.
+
+    Built once from a list of patterns; scanning a text reports every pattern
+    that occurs in it in time linear in the text length plus the number of
+    matches, however many patterns there are.
+
+    Example:
+        automaton = AhoCorasick(["bob ate", "the cookie"])
+        set(automaton.find_in("did bob ate the cookie"))  # {0, 1}
+    """
+
+    def __init__(self, patterns: list[str]):
+        """
+        Args:
+            patterns: Non-empty strings to search for; ids are list positions
+        """
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[tuple[int, ...]] = [()]
+        self.pattern_count = len(patterns)
+
+        terminal: dict[int, list[int]] = {}
+        for pattern_id, pattern in enumerate(patterns):
+            if not pattern:
+                raise ValueError("AhoCorasick patterns must be non-empty")
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                node = next_node
+            terminal.setdefault(node, []).append(pattern_id)
+
+        for node, pattern_ids in terminal.items():
+            self._output[node] = tuple(pattern_ids)
+
+        # Breadth-first so every failure link points at an already-finished node
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                if self._output[self._fail[child]]:
+                    self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find_in(self, text: str) -> Iterator[int]:
+        """
+        Yield the id of each pattern occurrence in text (a pattern occurring
+        twice is yielded twice).
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                yield from output[node]
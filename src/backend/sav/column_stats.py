@@ -0,0 +1,83 @@
+"""Per-column statistics computed once when a SAV file is loaded"""
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+
+
+class ColumnStats(NamedTuple):
+    """Precomputed facts about one SAV column"""
+    unique_values: tuple  # Sorted distinct non-missing responses, e.g. (1, 2, 4, 5)
+    minimum: float | None  # Smallest response, None for text or all-missing columns
+    maximum: float | None  # Largest response, None for text or all-missing columns
+    missing_count: int  # Number of system-missing responses
+    value_codes: tuple | None  # Sorted value-label codes, None if the column has no value labels
+    value_labels: dict  # Value-label code -> text, e.g. {1.0: "Strongly agree"}
+    variable_type: str  # 'continuous', 'categorical', or 'unknown'
+
+
+def _sorted_unique(series: pd.Series) -> tuple:
+    """Sorted distinct non-missing values of a column as plain Python scalars"""
+    present = series.dropna()
+    if present.empty:
+        return ()
+    if isinstance(present.dtype, pd.CategoricalDtype):
+        present = present.astype(present.dtype.categories.dtype)
+    try:
+        values = np.unique(present.to_numpy())
+    except TypeError:
+        values = sorted(present.unique())
+    return tuple(v.item() if isinstance(v, np.generic) else v for v in values)
+
+
+def _infer_variable_type(is_numeric: bool, value_codes: tuple | None) -> str:
+    """Same rule the recode configurators use: labelled codes are categorical, unlabelled numbers continuous"""
+    if value_codes is not None and len(value_codes) >= 2:
+        return 'categorical'
+    if value_codes is None and is_numeric:
+        return 'continuous'
+    return 'unknown'
+
+
+def build_column_stats(df: pd.DataFrame, meta) -> dict[str, ColumnStats]:
+    """
+    Build the statistics catalog for every column of a loaded SAV file.
+
+    Missing counts and min/max are computed for the whole frame at once;
+    sorted unique values are computed once per column here so the UI never
+    has to call dropna().unique() on a rerun.
+
+    Args:
+        df: Survey DataFrame
+        meta: pyreadstat metadata object
+
+    Returns:
+        Dictionary mapping column name to ColumnStats
+        Example: {"Q1": ColumnStats(unique_values=(1, 2, 3), minimum=1.0, ...)}
+    """
+    missing_counts = df.isna().sum()
+    numeric = df.select_dtypes(include='number')
+    minimums = numeric.min()
+    maximums = numeric.max()
+    variable_value_labels = meta.variable_value_labels
+
+    catalog: dict[str, ColumnStats] = {}
+    for position, column in enumerate(df.columns):
+        if column in catalog:
+            continue
+        is_numeric = column in minimums.index
+        minimum = minimums[column] if is_numeric else None
+        maximum = maximums[column] if is_numeric else None
+
+        value_labels = variable_value_labels.get(column)
+        value_codes = tuple(sorted(value_labels.keys())) if value_labels is not None else None
+
+        catalog[column] = ColumnStats(
+            unique_values=_sorted_unique(df.iloc[:, position]),
+            minimum=None if minimum is None or pd.isna(minimum) else float(minimum),
+            maximum=None if maximum is None or pd.isna(maximum) else float(maximum),
+            missing_count=int(missing_counts.iloc[position]),
+            value_codes=value_codes,
+            value_labels=dict(value_labels) if value_labels else {},
+            variable_type=_infer_variable_type(is_numeric, value_codes)
+        )
+    return catalog
@@ -0,0 +1,77 @@
+"""Pairwise-complete Pearson correlation of recoded variables with matrix products"""
+import numpy as np
+import pandas as pd
+
+
+CHUNK_ROWS = 16_384  # Respondents converted to float64 at a time
+
+
+def pairwise_correlation(values: np.ndarray, valid: np.ndarray, chunk_rows: int = CHUNK_ROWS) -> np.ndarray:
+    """
+    Pearson r of every pair of columns over the rows where both are present.
+
+    For each pair the count, sums, sums of squares and cross-products over
+    the jointly valid rows are entries of two matrix products: [X M]'[X M]
+    (X the values with missing cells zeroed, M the validity mask as 0/1)
+    and (X*X)'M. Every pair is then finished at once with array arithmetic,
+    instead of looping over pairs as DataFrame.corr does when there are
+    missing values. Small integer codes give exact float64 sums, so the
+    only rounding is in the final division.
+
+    Rows are processed chunk_rows at a time, so memory stays bounded
+    however many respondents there are.
+
+    Args:
+        values: (rows, columns) int8 codes; cells where valid is False are ignored
+        valid: (rows, columns) bool, True where the value is present
+        chunk_rows: Rows per matrix-product chunk
+
+    Returns:
+        (columns, columns) float64 matrix; NaN where a pair has no rows in
+        common or either column is constant over them (as DataFrame.corr)
+    """
+    n_rows, n_columns = values.shape
+    products = np.zeros((2 * n_columns, 2 * n_columns))  # [X'X X'M; M'X M'M]
+    squares = np.zeros((n_columns, n_columns))  # (X*X)'M
+    for start in range(0, n_rows, chunk_rows):
+        mask = valid[start:start + chunk_rows].astype(float)
+        x = values[start:start + chunk_rows] * mask
+        stacked = np.hstack([x, mask])
+        products += stacked.T @ stacked
+        squares += (x * x).T @ mask
+
+    cross = products[:n_columns, :n_columns]
+    sums = products[:n_columns, n_columns:]  # sums[i, j]: column i summed over rows where j is present too
+    counts = products[n_columns:, n_columns:]
+
+    covariance = counts * cross - sums * sums.T
+    variance = counts * squares - sums * sums  # variance[i, j]: of column i, over rows where j is present too
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = covariance / (np.sqrt(variance) * np.sqrt(variance.T))
+    r[(variance <= 0) | (variance.T <= 0)] = np.nan
+    np.fill_diagonal(r, np.where(np.diagonal(variance) > 0, 1.0, np.nan))
+    return r
+
+
+def correlation_matrix(recoded_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pairwise-complete Pearson correlation of apply_recodes columns.
+
+    Args:
+        recoded_df: Nullable integer columns whose codes fit in int8
+
+    Returns:
+        Correlation DataFrame labelled by column, as recoded_df.corr()
+    """
+    n_rows, n_columns = recoded_df.shape
+    values = np.empty((n_rows, n_columns), dtype=np.int8)
+    valid = np.empty((n_rows, n_columns), dtype=bool)
+    for position in range(n_columns):
+        series = recoded_df.iloc[:, position]
+        valid[:, position] = series.notna().to_numpy()
+        values[:, position] = series.to_numpy(dtype=np.int8, na_value=0)
+    return pd.DataFrame(
+        pairwise_correlation(values, valid),
+        index=recoded_df.columns,
+        columns=recoded_df.columns
+    )
@@ -0,0 +1,110 @@
+"""Post-load dtype compaction for survey DataFrames read from SAV files"""
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+
+
+INT8_MIN = np.iinfo(np.int8).min
+INT8_MAX = np.iinfo(np.int8).max
+
+
+class CompactionReport(NamedTuple):
+    """Result of compacting a survey DataFrame"""
+    bytes_before: int  # Deep memory usage before compaction
+    bytes_after: int  # Deep memory usage after compaction
+    int8_columns: int  # Numeric columns stored as int8 / nullable Int8
+    categorical_columns: int  # Text columns stored as Categorical
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+def _compact_numeric(values: np.ndarray):
+    """
+    Convert a float column to int8 when every non-missing value is a small integer.
+
+    Returns:
+        numpy int8 array when there is no missing data, nullable Int8 array
+        when there is, or None if the column does not fit in int8
+    """
+    missing = np.isnan(values)
+    present = values[~missing]
+    if present.size and (
+        present.min() < INT8_MIN
+        or present.max() > INT8_MAX
+        or not np.array_equal(present, np.floor(present))
+    ):
+        return None
+
+    codes = np.where(missing, 0, values).astype(np.int8)
+    if not missing.any():
+        return codes
+    return pd.arrays.IntegerArray(codes, missing)
+
+
+def _compact_text(series: pd.Series, max_category_ratio: float):
+    """
+    Convert a text column to Categorical when it has few distinct values.
+
+    Returns:
+        Categorical series, or None if the column is too high-cardinality
+    """
+    if len(series) == 0:
+        return None
+    if series.nunique(dropna=True) > len(series) * max_category_ratio:
+        return None
+    return series.astype('category')
+
+
+def compact_survey_frame(
+    df: pd.DataFrame,
+    max_category_ratio: float = 0.5
+) -> tuple[pd.DataFrame, CompactionReport]:
+    """
+    Shrink a pyreadstat DataFrame by storing small integer domains as int8.
+
+    pyreadstat returns every numeric variable as float64 even though most survey
+    variables are 1-7 Likert or small categorical codes. Columns whose non-missing
+    values are all integers in the int8 range become int8 (no missing data) or
+    nullable Int8 (missing data kept as <NA>). Low-cardinality text columns become
+    Categorical. Anything else is left untouched.
+
+    Args:
+        df: DataFrame as returned by pyreadstat.read_sav
+        max_category_ratio: Text columns with more distinct values than this
+            fraction of rows are left as plain strings
+
+    Returns:
+        Tuple of (compacted DataFrame, CompactionReport)
+    """
+    bytes_before = int(df.memory_usage(deep=True).sum())
+    int8_columns = 0
+    categorical_columns = 0
+    compacted = {}
+
+    for position, column in enumerate(df.columns):
+        series = df.iloc[:, position]
+        converted = None
+
+        if series.dtype.kind == 'f':
+            converted = _compact_numeric(series.to_numpy())
+            if converted is not None:
+                int8_columns += 1
+        elif series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            converted = _compact_text(series, max_category_ratio)
+            if converted is not None:
+                categorical_columns += 1
+
+        compacted[position] = series if converted is None else converted
+
+    result = pd.DataFrame(compacted, index=df.index)
+    result.columns = df.columns
+    bytes_after = int(result.memory_usage(deep=True).sum())
+
+    return result, CompactionReport(
+        bytes_before=bytes_before,
+        bytes_after=bytes_after,
+        int8_columns=int8_columns,
+        categorical_columns=categorical_columns
+    )
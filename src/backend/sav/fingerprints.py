@@ -0,0 +1,27 @@
+"""Stable content hashes used as cache keys"""
+import hashlib
+from typing import Iterable
+
+
+def fingerprint_labels(sav_labels: Iterable[tuple[str, str]], salt: str = "") -> str:
+    """
+    Hash of a SAV file's (column, label) pairs, in order.
+
+    Two files with the same variables and labels get the same fingerprint even
+    if their response data differs, which is all statement matching depends on.
+
+    Args:
+        sav_labels: (column_name, label) pairs, e.g. a SavCatalog
+        salt: Extra text mixed into the hash (e.g. matcher version and settings)
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256(salt.encode('utf-8'))
+    for column, label in sav_labels:
+        digest.update(b'\x1e')
+        digest.update(str(column).encode('utf-8'))
+        digest.update(b'\x1f')
+        # None (unlabelled) must not collide with the label text "None"
+        digest.update(b'\x00' if label is None else str(label).encode('utf-8'))
+    return digest.hexdigest()
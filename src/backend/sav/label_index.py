@@ -0,0 +1,407 @@
+"""Precomputed search index over normalised SAV labels"""
+import heapq
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Callable, Iterable, NamedTuple
+from .aho_corasick import AhoCorasick
+from ..text_canonical import canonicalize
+
+
+NGRAM_SIZE = 3
+
+# A truncated side must cover this share of the longer text to be scored on the prefix alone
+PREFIX_MIN_COVERAGE = 0.8
+
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+
+
+class FuzzyMatch(NamedTuple):
+    """Best approximate match for a question"""
+    column: str
+    label: str
+    score: float  # Similarity from 0 to 1
+
+
+def _ngrams(text: str) -> set[str]:
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def _fuzzy_key(text: str) -> str:
+    """Canonical and lowercase, with punctuation and spacing differences removed"""
+    return _NON_ALNUM_RE.sub(' ', canonicalize(text).lower()).strip()
+
+
+def _similarity(query_key: str, label_key: str) -> float:
+    """
+    Similarity of two fuzzy keys, tolerant of one side being cut short.
+
+    A slightly truncated label is compared against the same-length start of
+    the question (and vice versa), so "the defendant was negligent in its"
+    still scores highly against "the defendant was negligent in its duty".
+    Only when the shorter text covers at least PREFIX_MIN_COVERAGE of the
+    longer one: a short label such as "what is your age" must not match a
+    longer, different question just because it starts the same way.
+    """
+    score = SequenceMatcher(None, query_key, label_key, autojunk=False).ratio()
+    shorter = min(len(query_key), len(label_key))
+    # Share of the longer text the prefix comparison would see
+    coverage = shorter / max(len(query_key), len(label_key), 1)
+    if shorter and len(query_key) != len(label_key) and coverage >= PREFIX_MIN_COVERAGE:
+        prefix_score = SequenceMatcher(
+            None, query_key[:shorter], label_key[:shorter], autojunk=False
+        ).ratio()
+        score = max(score, prefix_score * (0.8 + 0.2 * coverage))
+    return score
+
+
+class LabelDiff(NamedTuple):
+    """Differences between the indexed (column, label) entries of two label sets"""
+    added: list[tuple[str, str]]  # (column, label) for columns only in the new set
+    removed: list[tuple[str, str]]  # (column, label) for columns only in the old set
+    changed: list[tuple[str, str, str]]  # (column, old label, new label)
+    reordered: bool  # Entries present in both sets appear in a different order
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed or self.reordered)
+
+
+def _index_entries(label_to_column: dict[str, str]) -> list[tuple[str, str]]:
+    """(column, label) pairs a LabelIndex holds, in mapping order"""
+    # Unlabelled and recoded columns are never match targets
+    return [
+        (column, label) for label, column in label_to_column.items()
+        if label is not None and not column.lower().endswith('.r')
+    ]
+
+
+def _remove_from_postings(postings: dict[str, list[int]], copied: set[str], grams: set[str], entry_id: int) -> None:
+    """Drop an entry from its grams' postings, copying each list before its first change"""
+    for gram in grams:
+        posting = postings.get(gram)
+        if posting is None:
+            continue
+        if gram not in copied:
+            posting = list(posting)
+            postings[gram] = posting
+            copied.add(gram)
+        posting.remove(entry_id)
+        if not posting:
+            del postings[gram]
+
+
+def _add_to_postings(postings: dict[str, list[int]], copied: set[str], grams: set[str], entry_id: int) -> None:
+    for gram in grams:
+        posting = postings.get(gram)
+        if posting is None:
+            postings[gram] = [entry_id]
+            copied.add(gram)
+            continue
+        if gram not in copied:
+            posting = list(posting)
+            postings[gram] = posting
+            copied.add(gram)
+        posting.append(entry_id)
+
+
+class LabelIndex:
+    """
+    Normalised labels of non-recoded columns plus trigram postings over them.
+
+    Built once per label set. A substring query only has to verify the labels
+    that contain every trigram of the query, instead of normalising and
+    scanning every label on every lookup. Matches are resolved in the order of
+    the label mapping, so the first verified candidate is the same label a
+    linear scan would have returned.
+
+    Entries have stable ids: updated() derives the index for a new version of
+    the SAV file by dropping and adding only the entries that differ, and an
+    order array (_order/_rank) keeps lookups in the new label order.
+    """
+
+    # Above this share of changed entries, updated() rebuilds from scratch
+    REBUILD_FRACTION = 0.25
+
+    def __init__(self, label_to_column: dict[str, str], normalize: Callable[[str], str]):
+        """
+        Args:
+            label_to_column: Label -> column mapping from _build_label_mapping
+            normalize: The processor's _normalize_text
+        """
+        # Indexed by entry id; ids of removed entries keep their slot
+        self._columns: list[str] = []
+        self._labels: list[str] = []
+        self._normalized: list[str] = []
+        self._entry_ids: dict[tuple[str, str], int] = {}
+        self._postings: dict[str, list[int]] = {}
+        # Built on the first fuzzy lookup; most sessions never need them
+        self._fuzzy_keys: list[str] | None = None
+        self._fuzzy_postings: dict[str, list[int]] | None = None
+        self._fuzzy_gram_counts: list[int] | None = None
+
+        for column, label in _index_entries(label_to_column):
+            entry_id = self._append_entry(column, label, normalize(label))
+            for gram in _ngrams(self._normalized[entry_id]):
+                self._postings.setdefault(gram, []).append(entry_id)
+        self._set_order(list(range(len(self._columns))))
+
+    def _append_entry(self, column: str, label: str, normalized: str) -> int:
+        entry_id = len(self._columns)
+        self._columns.append(column)
+        self._labels.append(label)
+        self._normalized.append(normalized)
+        self._entry_ids[(column, label)] = entry_id
+        return entry_id
+
+    def _set_order(self, order: list[int]) -> None:
+        """Live entry ids in label order, plus each id's position in it (-1 if removed)"""
+        self._order = order
+        self._rank = [-1] * len(self._columns)
+        for position, entry_id in enumerate(order):
+            self._rank[entry_id] = position
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def entries(self) -> Iterable[tuple[str, str, str]]:
+        """(column, label, normalised label) for every indexed label, in order"""
+        return ((self._columns[i], self._labels[i], self._normalized[i]) for i in self._order)
+
+    def diff(self, label_to_column: dict[str, str]) -> LabelDiff:
+        """
+        Compare this index's entries with those a new label mapping would give.
+
+        Args:
+            label_to_column: Label -> column mapping of the new label set
+
+        Returns:
+            LabelDiff of added, removed and relabelled columns
+        """
+        return self._diff(_index_entries(label_to_column))
+
+    def _diff(self, new_entries: list[tuple[str, str]]) -> LabelDiff:
+        old_labels = {self._columns[i]: self._labels[i] for i in self._order}
+        new_labels = dict(new_entries)
+
+        added = [(c, l) for c, l in new_entries if c not in old_labels]
+        removed = [(c, old_labels[c]) for c in (self._columns[i] for i in self._order) if c not in new_labels]
+        changed = [(c, old_labels[c], l) for c, l in new_entries if c in old_labels and old_labels[c] != l]
+
+        kept_old = [self._columns[i] for i in self._order if new_labels.get(self._columns[i]) == self._labels[i]]
+        kept_set = set(kept_old)
+        kept_new = [c for c, _ in new_entries if c in kept_set]
+        return LabelDiff(added, removed, changed, kept_old != kept_new)
+
+    def updated(self, label_to_column: dict[str, str], normalize: Callable[[str], str]) -> tuple["LabelIndex", LabelDiff]:
+        """
+        Index for a new version of the label set, reusing every unchanged entry.
+
+        This index is left untouched (it may be shared). Only added and
+        relabelled entries are normalised and posted; removed and relabelled
+        entries are dropped from the postings lists they appear in, which are
+        copied on first change. A built fuzzy index is carried over the same way.
+
+        Args:
+            label_to_column: Label -> column mapping of the new label set
+            normalize: The processor's _normalize_text
+
+        Returns:
+            (new LabelIndex, LabelDiff against this index)
+        """
+        new_entries = _index_entries(label_to_column)
+        diff = self._diff(new_entries)
+        dropped = [(c, l) for c, l in diff.removed] + [(c, old) for c, old, _ in diff.changed]
+        posted = [(c, l) for c, l in diff.added] + [(c, new) for c, _, new in diff.changed]
+        if len(dropped) + len(posted) > self.REBUILD_FRACTION * max(len(self._order), 1):
+            return LabelIndex(label_to_column, normalize), diff
+
+        index = LabelIndex.__new__(LabelIndex)
+        index._columns = list(self._columns)
+        index._labels = list(self._labels)
+        index._normalized = list(self._normalized)
+        index._entry_ids = dict(self._entry_ids)
+        index._postings = dict(self._postings)
+        has_fuzzy = self._fuzzy_keys is not None
+        index._fuzzy_keys = list(self._fuzzy_keys) if has_fuzzy else None
+        index._fuzzy_postings = dict(self._fuzzy_postings) if has_fuzzy else None
+        index._fuzzy_gram_counts = list(self._fuzzy_gram_counts) if has_fuzzy else None
+
+        copied: set[str] = set()
+        fuzzy_copied: set[str] = set()
+        for pair in dropped:
+            entry_id = index._entry_ids.pop(pair)
+            _remove_from_postings(index._postings, copied, _ngrams(index._normalized[entry_id]), entry_id)
+            if has_fuzzy:
+                _remove_from_postings(
+                    index._fuzzy_postings, fuzzy_copied, _ngrams(index._fuzzy_keys[entry_id]), entry_id
+                )
+        for column, label in posted:
+            entry_id = index._append_entry(column, label, normalize(label))
+            _add_to_postings(index._postings, copied, _ngrams(index._normalized[entry_id]), entry_id)
+            if has_fuzzy:
+                key = _fuzzy_key(label)
+                grams = _ngrams(key)
+                index._fuzzy_keys.append(key)
+                index._fuzzy_gram_counts.append(len(grams))
+                _add_to_postings(index._fuzzy_postings, fuzzy_copied, grams, entry_id)
+
+        index._set_order([index._entry_ids[pair] for pair in new_entries])
+        return index, diff
+
+    def candidates(self, normalized_query: str) -> list[int]:
+        """
+        Entry ids whose label may contain the query, in label order.
+
+        Queries shorter than one trigram cannot be narrowed down, so every
+        entry is a candidate.
+        """
+        grams = _ngrams(normalized_query)
+        if not grams:
+            return list(self._order)
+
+        postings = []
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches.intersection_update(posting)
+            if not matches:
+                return []
+        return sorted(matches, key=self._rank.__getitem__)
+
+    def find(self, normalized_query: str) -> str | None:
+        """
+        Column of the first label containing the normalised query.
+
+        Args:
+            normalized_query: Query already passed through _normalize_text
+
+        Returns:
+            Column name, or None if no label contains the query
+        """
+        for entry_id in self.candidates(normalized_query):
+            if normalized_query in self._normalized[entry_id]:
+                return self._columns[entry_id]
+        return None
+
+    def find_many(self, normalized_queries: list[str]) -> list[str | None]:
+        """
+        Column of the first label containing each query, for a whole batch.
+
+        Builds one Aho–Corasick automaton over the queries and scans the
+        normalised labels once, in order, so the first label a query is seen
+        in is the same one find() would return. Scanning stops early once
+        every query has a match.
+
+        Args:
+            normalized_queries: Queries already passed through _normalize_text
+
+        Returns:
+            Column name or None for each query, in the same order
+        """
+        results: list[str | None] = [None] * len(normalized_queries)
+        if not self._order:
+            return results
+
+        positions_by_query: dict[str, list[int]] = {}
+        for position, query in enumerate(normalized_queries):
+            if query:
+                positions_by_query.setdefault(query, []).append(position)
+            else:
+                results[position] = self._columns[self._order[0]]  # '' is in every label
+
+        patterns = list(positions_by_query)
+        if not patterns:
+            return results
+
+        automaton = AhoCorasick(patterns)
+        unresolved = len(patterns)
+        resolved = [False] * len(patterns)
+        for entry_id in self._order:
+            for pattern_id in automaton.find_in(self._normalized[entry_id]):
+                if resolved[pattern_id]:
+                    continue
+                resolved[pattern_id] = True
+                unresolved -= 1
+                for position in positions_by_query[patterns[pattern_id]]:
+                    results[position] = self._columns[entry_id]
+            if unresolved == 0:
+                break
+        return results
+
+    def _build_fuzzy_index(self) -> None:
+        # Built in locals and published keys-last: the index is shared across
+        # sessions, and fuzzy_find only checks _fuzzy_keys
+        keys: list[str] = []
+        postings: dict[str, list[int]] = {}
+        gram_counts: list[int] = []
+        live = set(self._order)
+        for entry_id, label in enumerate(self._labels):
+            key = _fuzzy_key(label)
+            grams = _ngrams(key)
+            keys.append(key)
+            gram_counts.append(len(grams))
+            if entry_id not in live:
+                continue  # removed by updated(); keeps its slot but is never a candidate
+            for gram in grams:
+                postings.setdefault(gram, []).append(entry_id)
+        self._fuzzy_postings = postings
+        self._fuzzy_gram_counts = gram_counts
+        self._fuzzy_keys = keys
+
+    def fuzzy_find(self, query: str, min_score: float, max_candidates: int = 20) -> FuzzyMatch | None:
+        """
+        Closest label to a question that has no exact or substring match.
+
+        Candidates come from a character-trigram inverted index over
+        lowercased, punctuation-free labels, ranked by trigram overlap (Dice
+        coefficient). Only the top candidates are scored with SequenceMatcher,
+        so the cost does not grow with edit distance over every label.
+
+        Args:
+            query: Question text (raw or normalised)
+            min_score: Lowest similarity accepted as a match
+            max_candidates: How many of the best-overlapping labels to score
+
+        Returns:
+            FuzzyMatch for the best candidate scoring at least min_score, else None
+        """
+        if self._fuzzy_keys is None:
+            self._build_fuzzy_index()
+
+        query_key = _fuzzy_key(query)
+        grams = _ngrams(query_key)
+        if not grams:
+            return None
+
+        overlap: Counter = Counter()
+        for gram in grams:
+            overlap.update(self._fuzzy_postings.get(gram, ()))
+        if not overlap:
+            return None
+
+        gram_counts = self._fuzzy_gram_counts
+        rank = self._rank
+        ranked = heapq.nlargest(
+            max_candidates,
+            overlap.items(),
+            key=lambda item: (2 * item[1] / (len(grams) + gram_counts[item[0]]), -rank[item[0]])
+        )
+
+        best: FuzzyMatch | None = None
+        best_rank = -1
+        for entry_id, _ in ranked:
+            score = _similarity(query_key, self._fuzzy_keys[entry_id])
+            if score < min_score:
+                continue
+            # Ties go to the earlier label, like the exact and substring matches
+            if best is None or score > best.score or (score == best.score and rank[entry_id] < best_rank):
+                best = FuzzyMatch(self._columns[entry_id], self._labels[entry_id], score)
+                best_rank = rank[entry_id]
+        return best
@@ -0,0 +1,100 @@
+"""Immutable per-SAV matching state shared by every processor built on the same labels"""
+import threading
+import weakref
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Callable, Iterable, Mapping
+from .fingerprints import fingerprint_labels
+from .label_index import LabelIndex
+from .sav_catalog import SavCatalog
+from .tfidf_index import TfidfLabelIndex
+
+
+MAX_SHARED_MATCHERS = 16
+
+
+class LabelMatcher:
+    """
+    Label -> column mapping and search indexes for one label set.
+
+    Built once per SAV file (and matcher settings) and shared read-only by
+    every SPSSMatchProcessor / SPSSSyntaxGenerator created for it, so a new
+    processor on each Streamlit rerun costs a cache lookup instead of
+    rebuilding the mapping and re-normalising every label. Per-call state
+    (matched/unmatched tracking, match confidence) stays on the processor.
+    """
+    __slots__ = ('fingerprint', 'label_to_column', 'label_index', '_tfidf_index', '_lock')
+
+    def __init__(self, fingerprint: str, label_to_column: dict[str, str], label_index: LabelIndex):
+        """
+        Args:
+            fingerprint: fingerprint_labels() of the labels and matcher settings
+            label_to_column: Label -> column mapping (wrapped read-only)
+            label_index: Normalised-label index built from the same mapping
+        """
+        self.fingerprint = fingerprint
+        self.label_to_column: Mapping[str, str] = MappingProxyType(label_to_column)
+        self.label_index = label_index
+        self._tfidf_index: TfidfLabelIndex | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def tfidf_index(self) -> TfidfLabelIndex:
+        """TF-IDF matrix over the indexed labels, built on first use"""
+        with self._lock:
+            if self._tfidf_index is None:
+                columns: list[str] = []
+                labels: list[str] = []
+                for column, label, _ in self.label_index.entries():
+                    columns.append(column)
+                    labels.append(label)
+                self._tfidf_index = TfidfLabelIndex(columns, labels)
+            return self._tfidf_index
+
+
+_matchers: OrderedDict[str, LabelMatcher] = OrderedDict()
+# Fingerprints of catalogs already hashed, so shared catalogs skip re-hashing
+_catalog_fingerprints: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_matchers_lock = threading.Lock()
+
+
+def shared_label_matcher(
+    sav_labels: Iterable[tuple[str, str]],
+    salt: str,
+    build: Callable[[str], LabelMatcher]
+) -> LabelMatcher:
+    """
+    Return the shared matcher for a label set, building it on the first request.
+
+    Args:
+        sav_labels: (column_name, label) pairs, e.g. a SavCatalog
+        salt: Matcher version and settings; different salts get different matchers
+        build: Called with the fingerprint to create the matcher on a miss
+
+    Returns:
+        LabelMatcher shared by every caller with the same labels and salt
+    """
+    fingerprint = None
+    if isinstance(sav_labels, SavCatalog):
+        with _matchers_lock:
+            fingerprint = _catalog_fingerprints.get(sav_labels, {}).get(salt)
+    if fingerprint is None:
+        fingerprint = fingerprint_labels(sav_labels, salt=salt)
+        if isinstance(sav_labels, SavCatalog):
+            with _matchers_lock:
+                _catalog_fingerprints.setdefault(sav_labels, {})[salt] = fingerprint
+
+    with _matchers_lock:
+        matcher = _matchers.get(fingerprint)
+        if matcher is not None:
+            _matchers.move_to_end(fingerprint)
+            return matcher
+
+    # Build outside the lock; if two sessions race, the first one stored wins
+    matcher = build(fingerprint)
+    with _matchers_lock:
+        matcher = _matchers.setdefault(fingerprint, matcher)
+        _matchers.move_to_end(fingerprint)
+        while len(_matchers) > MAX_SHARED_MATCHERS:
+            _matchers.popitem(last=False)
+        return matcher
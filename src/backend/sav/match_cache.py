@@ -0,0 +1,201 @@
+"""In-memory LRU cache of statement matches, optionally persisted to local disk"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+
+DEFAULT_MAX_ENTRIES = 50_000
+DEFAULT_MAX_FILES = 200
+
+
+class CachedMatch(NamedTuple):
+    """A remembered match result (column is None for a remembered miss)"""
+    column: str | None
+    confidence: float | None
+
+
+class MatchCache:
+    """
+    Statement -> column matches keyed by (label-set fingerprint, normalised statement).
+
+    The fingerprint covers every (column, label) pair of the SAV file plus the
+    matcher version, so a cached result is only reused for a file with exactly
+    the same labels and the same matching logic. Misses are cached too, since
+    an unmatched statement costs a full fuzzy lookup.
+
+    Entries live in an LRU dictionary. With a cache directory, each
+    fingerprint also has an append-only JSON-lines file, read the first time
+    that fingerprint is seen in this process, so matches survive restarts.
+    The files hold statement text and SAV labels, so persistence is off
+    unless a directory is given.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        cache_dir: str | None = None,
+        max_files: int = DEFAULT_MAX_FILES
+    ):
+        """
+        Args:
+            max_entries: Matches held in memory before the least recently used is dropped
+            cache_dir: Directory for the persisted files; None keeps the cache in memory only
+            max_files: Persisted fingerprints kept on disk, oldest removed first
+        """
+        self._max_entries = max_entries
+        self._cache_dir = os.path.expanduser(cache_dir) if cache_dir else None
+        self._max_files = max_files
+        self._entries: OrderedDict[tuple[str, str], CachedMatch] = OrderedDict()
+        self._loaded: set[str] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, fingerprint: str, statement: str) -> CachedMatch | None:
+        """
+        Cached match for a normalised statement, or None if it has not been seen.
+        """
+        with self._lock:
+            self._load(fingerprint)
+            key = (fingerprint, statement)
+            match = self._entries.get(key)
+            if match is not None:
+                self._entries.move_to_end(key)
+            return match
+
+    def put(self, fingerprint: str, statement: str, match: CachedMatch) -> None:
+        self.put_many(fingerprint, {statement: match})
+
+    def put_many(self, fingerprint: str, matches: dict[str, CachedMatch]) -> None:
+        """
+        Remember several matches for one label set, with a single disk append.
+
+        Args:
+            fingerprint: fingerprint_labels() of the processor's labels
+            matches: Normalised statement -> CachedMatch
+        """
+        if not matches:
+            return
+        with self._lock:
+            self._load(fingerprint)
+            new_lines = []
+            for statement, match in matches.items():
+                key = (fingerprint, statement)
+                if self._entries.get(key) != match:
+                    new_lines.append(json.dumps([statement, match.column, match.confidence]))
+                self._entries[key] = match
+                self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            if new_lines:
+                self._append(fingerprint, new_lines)
+
+    def clear(self) -> None:
+        """Forget everything held in memory (persisted files are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._loaded.clear()
+
+    def _path(self, fingerprint: str) -> str:
+        return os.path.join(self._cache_dir, f"{fingerprint}.jsonl")
+
+    def _load(self, fingerprint: str) -> None:
+        """Read a fingerprint's persisted matches on first use (caller holds the lock)"""
+        if fingerprint in self._loaded:
+            return
+        self._loaded.add(fingerprint)
+        if self._cache_dir is None:
+            return
+
+        path = self._path(fingerprint)
+        try:
+            with open(path, encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return
+
+        loaded: dict[str, CachedMatch] = {}
+        for line in lines:
+            try:
+                statement, column, confidence = json.loads(line)
+            except (ValueError, TypeError):
+                continue  # a line cut short by a crash; later appends still count
+            loaded[statement] = CachedMatch(column, confidence)
+
+        for statement, match in loaded.items():
+            self._entries[(fingerprint, statement)] = match
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+        # Later lines override earlier ones; rewrite once duplicates pile up
+        if len(lines) > 2 * len(loaded) + 100:
+            self._rewrite(path, [
+                json.dumps([statement, match.column, match.confidence])
+                for statement, match in loaded.items()
+            ])
+
+    def _append(self, fingerprint: str, lines: list[str]) -> None:
+        if self._cache_dir is None:
+            return
+        path = self._path(fingerprint)
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            is_new = not os.path.exists(path)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+        except OSError:
+            return  # persistence is best effort; the in-memory cache still works
+        if is_new:
+            self._prune_files()
+
+    @staticmethod
+    def _rewrite(path: str, lines: list[str]) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(''.join(line + '\n' for line in lines))
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def _prune_files(self) -> None:
+        """Delete the least recently written files beyond max_files"""
+        try:
+            paths = [
+                os.path.join(self._cache_dir, name)
+                for name in os.listdir(self._cache_dir)
+                if name.endswith('.jsonl')
+            ]
+            if len(paths) <= self._max_files:
+                return
+            paths.sort(key=os.path.getmtime)
+            for path in paths[:len(paths) - self._max_files]:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+_match_cache: MatchCache | None = None
+_match_cache_lock = threading.Lock()
+
+
+def get_match_cache() -> MatchCache:
+    """
+    Return the process-wide match cache, creating it on first use.
+
+    The cache is memory only unless CROSSTAB_MATCH_CACHE_DIR names a
+    directory to persist matches in (e.g. ~/.cache/crosstab/match_cache).
+    CROSSTAB_MATCH_CACHE_ENTRIES sets the in-memory size (default 50,000
+    matches).
+    """
+    global _match_cache
+    with _match_cache_lock:
+        if _match_cache is None:
+            _match_cache = MatchCache(
+                max_entries=int(os.environ.get('CROSSTAB_MATCH_CACHE_ENTRIES', DEFAULT_MAX_ENTRIES)),
+                cache_dir=os.environ.get('CROSSTAB_MATCH_CACHE_DIR') or None
+            )
+        return _match_cache
@@ -0,0 +1,362 @@
+"""Typed recode plan compiled from the UI's recode settings, shared by the syntax generator and the recode executor"""
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+
+
+# Every setting a rule is compiled from; a rule only changes when one of these does
+RECODE_SETTING_KEYS = (
+    'variable_type', 'sysmis_becomes',
+    'range1_becomes', 'range1_start', 'range1_end', 'range1_operator', 'range1_value',
+    'range2_becomes', 'range2_start', 'range2_end', 'range2_operator', 'range2_value',
+    'recode_mode', 'value_map', 'output_labels'
+)
+
+LOWEST = -math.inf
+HIGHEST = math.inf
+
+# Output codes: 1 and 2 are always the two parties; lookup rules may use more
+NEUTRAL_CODE = 3
+DEFAULT_OUTPUT_LABELS = {NEUTRAL_CODE: "Neutral"}
+
+MAX_COMPILED_RULES = 4096
+
+# Recoded columns are stored as nullable Int8, so every output code must fit
+CODE_MIN, CODE_MAX = np.iinfo(np.int8).min, np.iinfo(np.int8).max
+
+
+class RecodeRange(NamedTuple):
+    """Values from low to high become one code"""
+    low: float  # LOWEST (-inf) for no lower bound
+    high: float  # HIGHEST (inf) for no upper bound
+    becomes: int
+    low_inclusive: bool = True
+    high_inclusive: bool = True
+
+    def contains(self, value: float) -> bool:
+        above = value > self.low or (self.low_inclusive and value == self.low)
+        below = value < self.high or (self.high_inclusive and value == self.high)
+        return above and below
+
+
+class ColumnRule(NamedTuple):
+    """
+    Compiled recode of one question's column.
+
+    Range rules take the first matching range. Lookup rules map each
+    response code to its own output code (any number of output codes), and
+    codes not in the lookup stay missing.
+    """
+    question: str
+    column: str
+    variable_type: str  # 'categorical' or 'continuous'
+    ranges: tuple[RecodeRange, ...]
+    sysmis_becomes: int | None  # Code for system-missing values; None leaves them missing
+    variable_label: str  # Label of the .r variable
+    mode: str = 'ranges'  # 'ranges' or 'lookup'
+    lookup: tuple[tuple[float, int], ...] = ()  # (response code, output code), by response code
+    extra_labels: tuple[tuple[int, str], ...] = ()  # Value labels for output codes other than 1 and 2
+
+
+class RecodePlan(NamedTuple):
+    """Compiled rules for every recodable question, in settings order"""
+    rules: tuple[ColumnRule, ...]
+    skipped: tuple[tuple[str, str], ...]  # (question, reason) for questions with nothing to recode
+
+
+def _freeze(value):
+    """Hashable, type-tagged form of a setting value (dicts become sorted item tuples)"""
+    if isinstance(value, dict):
+        return tuple(sorted(
+            ((key, type(key).__name__, _freeze(item)) for key, item in value.items()),
+            key=lambda entry: (str(entry[0]), entry[1])
+        ))
+    return (value, type(value).__name__)
+
+
+def settings_key(settings: dict) -> tuple:
+    """
+    Hashable key of the settings a rule depends on.
+
+    Value types are part of the key: 1 and 1.0 compare equal but are written
+    differently in syntax ("1 thru 2" vs "1.0 thru 2.0").
+    """
+    return tuple(_freeze(settings.get(key)) for key in RECODE_SETTING_KEYS)
+
+
+def recode_settings_fingerprint(recode_settings: dict) -> str:
+    """
+    Stable hash of everything the recoded values depend on.
+
+    Covers question order, each question's column and settings_key, so UI
+    bookkeeping such as match_confidence or 'original_values' does not
+    change it. The same settings give the same fingerprint in any process.
+
+    Returns:
+        SHA-256 hex digest
+    """
+    canonical = tuple(
+        (question, settings.get('column') or settings.get('matched_column'), settings_key(settings))
+        for question, settings in recode_settings.items()
+    )
+    return hashlib.sha256(repr(canonical).encode('utf-8')).hexdigest()
+
+
+def recode_variable_label(question: str, settings: dict) -> str:
+    """Variable label the syntax gives a question's .r variable"""
+    if settings.get('variable_type', 'categorical') == 'continuous':
+        return question
+    return f"Recode: {question}"
+
+
+def _operator_range(operator: str, value: float, becomes: int) -> RecodeRange | None:
+    """A continuous comparison as a range; open bounds stay open, so '<' and '>' are exact"""
+    if operator == '<':
+        return RecodeRange(LOWEST, value, becomes, high_inclusive=False)
+    if operator == '<=':
+        return RecodeRange(LOWEST, value, becomes)
+    if operator == '=':
+        return RecodeRange(value, value, becomes)
+    if operator == '>=':
+        return RecodeRange(value, HIGHEST, becomes)
+    if operator == '>':
+        return RecodeRange(value, HIGHEST, becomes, low_inclusive=False)
+    return None
+
+
+def _compile_lookup(question: str, column: str, settings: dict) -> ColumnRule | str:
+    """Rule for recode_mode 'lookup': value_map is {response code: output code or None}"""
+    sysmis_becomes = settings.get('sysmis_becomes')
+    lookup = []
+    for code, becomes in (settings.get('value_map') or {}).items():
+        if becomes is None:
+            continue
+        if float(code) != math.floor(float(code)):
+            return "lookup codes must be whole numbers"
+        lookup.append((code, becomes))
+    if not lookup and sysmis_becomes is None:
+        return "all codes set to None"
+
+    output_labels = {**DEFAULT_OUTPUT_LABELS, **(settings.get('output_labels') or {})}
+    used = sorted({becomes for _, becomes in lookup} | ({sysmis_becomes} - {None}))
+    return ColumnRule(
+        question=question,
+        column=column,
+        variable_type='categorical',
+        ranges=(),
+        sysmis_becomes=sysmis_becomes,
+        variable_label=recode_variable_label(question, settings),
+        mode='lookup',
+        lookup=tuple(sorted(lookup, key=lambda pair: float(pair[0]))),
+        extra_labels=tuple(
+            (code, output_labels[code]) for code in used
+            if code not in (1, 2) and code in output_labels
+        )
+    )
+
+
+def _output_codes(rule: ColumnRule) -> set:
+    codes = {rule_range.becomes for rule_range in rule.ranges} | {becomes for _, becomes in rule.lookup}
+    return codes | ({rule.sysmis_becomes} - {None})
+
+
+def _compile(question: str, column: str, settings: dict) -> ColumnRule | str:
+    rule = _compile_settings(question, column, settings)
+    if not isinstance(rule, str) and any(
+        code != int(code) or not CODE_MIN <= code <= CODE_MAX for code in _output_codes(rule)
+    ):
+        return f"output codes must be whole numbers from {CODE_MIN} to {CODE_MAX}"
+    return rule
+
+
+def _compile_settings(question: str, column: str, settings: dict) -> ColumnRule | str:
+    variable_type = settings.get('variable_type') or 'categorical'
+    if variable_type == 'unknown':
+        return "variable type could not be determined"
+    if variable_type != 'continuous' and settings.get('recode_mode') == 'lookup':
+        return _compile_lookup(question, column, settings)
+
+    sysmis_becomes = settings.get('sysmis_becomes')
+    ranges = []
+    for prefix in ('range1', 'range2'):
+        becomes = settings.get(f'{prefix}_becomes')
+        if becomes is None:
+            continue
+        if variable_type == 'continuous':
+            operator, value = settings.get(f'{prefix}_operator'), settings.get(f'{prefix}_value')
+            rule_range = _operator_range(operator, value, becomes) if value is not None else None
+        else:
+            start, end = settings.get(f'{prefix}_start'), settings.get(f'{prefix}_end')
+            rule_range = RecodeRange(start, end, becomes) if None not in (start, end) else None
+        if rule_range is not None:
+            ranges.append(rule_range)
+
+    if not ranges and sysmis_becomes is None:
+        if settings.get('range1_becomes') is None and settings.get('range2_becomes') is None:
+            return "all ranges set to None"
+        return "no complete range to recode"
+
+    return ColumnRule(
+        question=question,
+        column=column,
+        variable_type=variable_type,
+        ranges=tuple(ranges),
+        sysmis_becomes=sysmis_becomes,
+        variable_label=recode_variable_label(question, settings)
+    )
+
+
+_compiled_rules: OrderedDict[tuple, ColumnRule | str] = OrderedDict()
+_compiled_rules_lock = threading.Lock()
+
+
+def compile_rule(question: str, column: str, settings: dict) -> ColumnRule | str:
+    """
+    Compile one question's settings, memoised on the settings that matter.
+
+    Args:
+        question: Question text
+        column: SAV column the question is recoded from
+        settings: The question's recode settings
+
+    Returns:
+        ColumnRule, or the reason there is nothing to recode
+    """
+    key = (question, column, settings_key(settings))
+    with _compiled_rules_lock:
+        rule = _compiled_rules.get(key)
+        if rule is not None:
+            _compiled_rules.move_to_end(key)
+            return rule
+    rule = _compile(question, column, settings)
+    with _compiled_rules_lock:
+        _compiled_rules[key] = rule
+        while len(_compiled_rules) > MAX_COMPILED_RULES:
+            _compiled_rules.popitem(last=False)
+    return rule
+
+
+def compile_recode_plan(recode_settings: dict) -> RecodePlan:
+    """
+    Compile every question's settings into a RecodePlan.
+
+    The column is the settings' 'column' (or 'matched_column'); questions
+    without one, with an unknown variable type or with nothing mapped are
+    listed in skipped.
+    """
+    rules = []
+    skipped = []
+    for question, settings in recode_settings.items():
+        column = settings.get('column') or settings.get('matched_column')
+        if not column:
+            skipped.append((question, "no SAV column matched"))
+            continue
+        rule = compile_rule(question, column, settings)
+        if isinstance(rule, str):
+            skipped.append((question, rule))
+        else:
+            rules.append(rule)
+    return RecodePlan(tuple(rules), tuple(skipped))
+
+
+@lru_cache(maxsize=1024)
+def _lookup_table(lookup: tuple[tuple[float, int], ...]) -> tuple[int, np.ndarray]:
+    """
+    Dense table for a lookup rule: table[code - offset] is the output code (NaN if unmapped).
+
+    Returns:
+        Tuple of (offset, read-only float table)
+    """
+    codes = [int(code) for code, _ in lookup]
+    offset = min(codes)
+    table = np.full(max(codes) - offset + 1, np.nan)
+    for code, becomes in zip(codes, (becomes for _, becomes in lookup)):
+        table[code - offset] = becomes
+    table.flags.writeable = False
+    return offset, table
+
+
+def _execute_lookup(rule: ColumnRule, values: np.ndarray) -> np.ndarray:
+    """Recode by indexing the rule's dense table with each response code (one np.take)"""
+    if rule.lookup:
+        offset, table = _lookup_table(rule.lookup)
+        positions = values - offset
+        # NaN, codes outside the table and non-integer values are unmapped
+        valid = (positions >= 0) & (positions < len(table)) & (positions == np.floor(positions))
+        result = np.take(table, np.where(valid, positions, 0).astype(np.intp))
+        result[~valid] = np.nan
+    else:
+        result = np.full(len(values), np.nan)
+    if rule.sysmis_becomes is not None:
+        result[np.isnan(values)] = rule.sysmis_becomes
+    return result
+
+
+def execute_rule(rule: ColumnRule, values: np.ndarray) -> np.ndarray:
+    """
+    Recode one column with NumPy masks.
+
+    Lookup rules index a dense per-code table instead (see _execute_lookup).
+    Each range becomes a boolean mask over the whole column and np.select
+    picks, per row, the code of the first mask that holds, so precedence is
+    the plan's first-match order. SYSMIS is tested first (NaN never falls in
+    a range); rows no mask covers stay NaN.
+
+    Args:
+        rule: Compiled rule
+        values: Column as float64, NaN for SYSMIS
+
+    Returns:
+        float64 array of codes, NaN where nothing matched
+    """
+    if rule.mode == 'lookup':
+        return _execute_lookup(rule, values)
+    conditions = []
+    choices = []
+    if rule.sysmis_becomes is not None:
+        conditions.append(np.isnan(values))
+        choices.append(rule.sysmis_becomes)
+    for rule_range in rule.ranges:
+        above = values >= rule_range.low if rule_range.low_inclusive else values > rule_range.low
+        below = values <= rule_range.high if rule_range.high_inclusive else values < rule_range.high
+        conditions.append(above & below)
+        choices.append(rule_range.becomes)
+    return np.select(conditions, np.asarray(choices, dtype=float), default=np.nan)
+
+
+def as_int8_codes(codes: np.ndarray) -> pd.arrays.IntegerArray:
+    """Float codes from execute_rule (NaN where nothing matched) as int8 values plus a missing mask"""
+    missing = np.isnan(codes)
+    return pd.arrays.IntegerArray(np.where(missing, 0, codes).astype(np.int8), missing)
+
+
+def execute_recode_plan(plan: RecodePlan, df: pd.DataFrame) -> tuple[dict[str, pd.Series], list[tuple[str, str]]]:
+    """
+    Run a plan against the survey data.
+
+    Args:
+        plan: Compiled RecodePlan
+        df: Survey DataFrame
+
+    Returns:
+        Tuple of (question -> recoded Series, (question, reason) for every
+        question not recoded, including the plan's own skips)
+    """
+    recoded: dict[str, pd.Series] = {}
+    skipped = list(plan.skipped)
+    for rule in plan.rules:
+        if rule.column not in df.columns:
+            skipped.append((rule.question, f"column '{rule.column}' not found in SAV"))
+            continue
+        values = df[rule.column]
+        if not pd.api.types.is_numeric_dtype(values.dtype):
+            skipped.append((rule.question, f"column '{rule.column}' is not numeric"))
+            continue
+        codes = execute_rule(rule, values.to_numpy(dtype=float, na_value=np.nan))
+        recoded[rule.question] = pd.Series(codes, index=df.index)
+    return recoded, skipped
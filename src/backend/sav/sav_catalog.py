@@ -0,0 +1,113 @@
+"""Compact, shared container for everything read from one SAV file"""
+from typing import Iterator
+import numpy as np
+import pandas as pd
+from .column_stats import ColumnStats
+
+
+class SavCatalog:
+    """
+    Survey data, metadata and variable labels for one SAV file.
+
+    Column names and labels are stored once, as read-only numpy object arrays.
+    Lookups (column -> label, label -> columns) and the label DataFrame used by
+    the neutral search are built on first use and then shared by every
+    component. Iterating a catalog yields (column_name, label) pairs, so it can
+    be passed anywhere a sav_labels list is expected.
+
+    Example:
+        catalog.label_of("Q32")            # "Do you think Bob ate the cookie?"
+        catalog.columns_for("Age")         # ("Q1",)
+        list(catalog)[:1]                  # [("Q1", "Age")]
+    """
+    __slots__ = (
+        'df', 'meta', 'column_stats', 'compaction',
+        '_columns', '_labels', '_column_positions', '_label_columns', '_label_frame',
+        '__weakref__'
+    )
+
+    def __init__(self, df: pd.DataFrame, meta, column_stats: dict[str, ColumnStats], compaction=None):
+        """
+        Args:
+            df: Survey DataFrame
+            meta: pyreadstat metadata object
+            column_stats: Per-column statistics from build_column_stats
+            compaction: CompactionReport from the load, or None
+        """
+        self.df = df
+        self.meta = meta
+        self.column_stats = column_stats
+        self.compaction = compaction
+
+        names_to_labels = meta.column_names_to_labels
+        self._columns = np.array(df.columns, dtype=object)
+        self._labels = np.array([names_to_labels.get(col, col) for col in df.columns], dtype=object)
+        self._columns.flags.writeable = False
+        self._labels.flags.writeable = False
+
+        self._column_positions: dict[str, int] | None = None
+        self._label_columns: dict[str, tuple[str, ...]] | None = None
+        self._label_frame: pd.DataFrame | None = None
+
+    def view(self) -> "SavCatalog":
+        """
+        A catalog sharing this one's data, metadata and stats under a new DataFrame object.
+
+        The DataFrame is a shallow copy. With pandas copy-on-write, writing to
+        it copies the affected block first, so the original frame and every
+        other view are left unchanged. Lookups are built again on first use.
+        """
+        view = SavCatalog.__new__(SavCatalog)
+        view.df = self.df.copy(deep=False)
+        view.meta = self.meta
+        view.column_stats = self.column_stats
+        view.compaction = self.compaction
+        view._columns = self._columns
+        view._labels = self._labels
+        view._column_positions = None
+        view._label_columns = None
+        view._label_frame = None
+        return view
+
+    @property
+    def columns(self) -> np.ndarray:
+        """Column names in file order (read-only array)"""
+        return self._columns
+
+    @property
+    def labels(self) -> np.ndarray:
+        """Variable labels aligned with columns (read-only array)"""
+        return self._labels
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def __iter__(self) -> Iterator[tuple[str, str]]:
+        return zip(self._columns, self._labels)
+
+    def label_of(self, column: str) -> str | None:
+        """Variable label for a column, or None if the column is not in the file"""
+        if self._column_positions is None:
+            self._column_positions = {col: i for i, col in enumerate(self._columns)}
+        position = self._column_positions.get(column)
+        return None if position is None else self._labels[position]
+
+    def columns_for(self, label: str) -> tuple[str, ...]:
+        """All columns carrying a label, in file order (e.g. ("Q14", "Q14.r"))"""
+        if self._label_columns is None:
+            grouped: dict[str, list[str]] = {}
+            for column, text in zip(self._columns, self._labels):
+                grouped.setdefault(text, []).append(column)
+            self._label_columns = {text: tuple(cols) for text, cols in grouped.items()}
+        return self._label_columns.get(label, ())
+
+    def stats(self, column: str) -> ColumnStats | None:
+        """Precomputed statistics for a column, or None if the column is not in the file"""
+        return self.column_stats.get(column)
+
+    @property
+    def label_frame(self) -> pd.DataFrame:
+        """Two-column DataFrame (Column, Label) for searching labels"""
+        if self._label_frame is None:
+            self._label_frame = pd.DataFrame({"Column": self._columns, "Label": self._labels})
+        return self._label_frame
@@ -0,0 +1,212 @@
+"""Write the survey data with its recoded .r variables to a new SAV file"""
+import os
+import tempfile
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+import pyreadstat
+from .sav_catalog import SavCatalog
+from .recode_plan import compile_rule, recode_variable_label
+
+
+class SavExport(NamedTuple):
+    """Summary of a written SAV file"""
+    path: str
+    rows: int
+    columns: int  # Variables written, recoded ones included
+    recoded: list[str]  # .r variables written, in file order
+
+
+def recoded_variables(
+    recoded_df: pd.DataFrame,
+    recode_settings: dict
+) -> dict[str, tuple[pd.Series, str, dict[int, str]]]:
+    """
+    The .r variables the recode syntax would create, from apply_recodes output.
+
+    Args:
+        recoded_df: DataFrame returned by apply_recodes
+        recode_settings: Per-question recode settings
+
+    Returns:
+        "<column>.r" -> (recoded values, variable label, value labels for
+        output codes other than 1 and 2); when several
+        questions recode one column the last one wins, as in the syntax
+    """
+    variables: dict[str, tuple[pd.Series, str, dict[int, str]]] = {}
+    for label, settings in recode_settings.items():
+        column = settings.get('column') or settings.get('matched_column')
+        recode_column = f"Recode: {label}"
+        if not column or recode_column not in recoded_df.columns:
+            continue
+        target = f"{column}.r"
+        variables.pop(target, None)
+        rule = compile_rule(label, column, settings)
+        extra_labels = {} if isinstance(rule, str) else dict(rule.extra_labels)
+        variables[target] = (recoded_df[recode_column], recode_variable_label(label, settings), extra_labels)
+    return variables
+
+
+def _integer_labels(labels: dict) -> dict[int, str] | None:
+    """Value labels re-keyed by int, or None if a key is not a whole number"""
+    keyed = {}
+    for value, text in labels.items():
+        if not float(value).is_integer():
+            return None
+        keyed[int(value)] = text
+    return keyed
+
+
+def _writable(series: pd.Series, labels: dict | None) -> tuple[pd.Series, dict | None]:
+    """
+    A column and its value labels in a form pyreadstat accepts.
+
+    Integer columns (compacted int8, nullable Int8, apply_recodes' Int8) are
+    written as they are, missing values as SYSMIS. pyreadstat only accepts
+    int value-label keys on them, so the SAV's float keys are converted;
+    if one is fractional, that column alone is converted to float64 instead.
+    Object columns holding numbers and other numeric extension dtypes become
+    float64; everything else is passed through.
+
+    Args:
+        series: Column to write
+        labels: Its value labels, or None
+
+    Returns:
+        (column to write, value labels to write)
+    """
+    if pd.api.types.is_integer_dtype(series.dtype):
+        if not labels:
+            return series, labels
+        keyed = _integer_labels(labels)
+        if keyed is not None:
+            return series, keyed
+    elif series.dtype == object:
+        return pd.to_numeric(series).astype(float), labels
+    elif not (isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_numeric_dtype(series.dtype)):
+        return series, labels
+    return pd.Series(series.to_numpy(dtype=float, na_value=np.nan), index=series.index, name=series.name), labels
+
+
+def write_recoded_sav(
+    catalog: SavCatalog,
+    recoded_df: pd.DataFrame,
+    recode_settings: dict,
+    name1: str,
+    name2: str,
+    path: str,
+    columns: list[str] | None = None,
+    compress: bool = False
+) -> SavExport:
+    """
+    Write the survey data plus one .r variable per recoded question with pyreadstat.
+
+    The .r variables get the variable labels and value labels the
+    generated syntax would set, and the original variables keep their labels,
+    value labels, missing ranges, measures and formats. An existing .r
+    variable is replaced by the recoded values.
+
+    The output frame references the catalog's columns and the recoded
+    columns without copying them: integer columns keep their int8 storage
+    and get int value-label keys. Only columns pyreadstat cannot take as
+    they are (see _writable) are converted, one float64 column each, so
+    beyond pyreadstat's own write buffers the extra memory is those columns
+    alone. Pass columns to write just the variables that are needed (e.g.
+    respondent ids and the recoded questions); every .r variable is always
+    written.
+
+    Args:
+        catalog: SavCatalog the recodes were computed from
+        recoded_df: DataFrame returned by apply_recodes
+        recode_settings: Per-question recode settings
+        name1: Label for code 1
+        name2: Label for code 2
+        path: Destination .sav path
+        columns: Original variables to keep, in order; None keeps all
+        compress: Write a compressed .zsav-style file
+
+    Returns:
+        SavExport summary
+    """
+    meta = catalog.meta
+    df = catalog.df
+    recoded = recoded_variables(recoded_df, recode_settings)
+
+    file_value_labels = meta.variable_value_labels or {}
+    kept = list(df.columns) if columns is None else [column for column in columns if column in df.columns]
+    data: dict[str, pd.Series] = {}
+    value_labels: dict[str, dict] = {}
+    for column in kept:
+        if column in recoded:
+            continue  # replaced in place below
+        data[column], labels = _writable(df[column], file_value_labels.get(column))
+        if labels:
+            value_labels[column] = labels
+    for target, (values, _, extra_labels) in recoded.items():
+        data[target], value_labels[target] = _writable(values, {1: name1, 2: name2, **extra_labels})
+    order = kept + [target for target in recoded if target not in kept]  # .r variables replace in place
+    output = pd.DataFrame({column: data[column] for column in order}, index=df.index, copy=False)
+
+    written = set(data)
+    column_labels = {
+        column: meta.column_names_to_labels.get(column)
+        for column in written
+    }
+    measures = {
+        column: measure for column, measure in (meta.variable_measure or {}).items()
+        if column in written
+    }
+    formats = {
+        column: fmt for column, fmt in (meta.original_variable_types or {}).items()
+        if column in written and column not in recoded and not fmt.upper().startswith('A')
+    }
+    for target, (_, label, _) in recoded.items():
+        column_labels[target] = label
+        measures[target] = 'nominal'
+        formats[target] = 'F8.0'
+
+    pyreadstat.write_sav(
+        output,
+        path,
+        file_label=meta.file_label or '',
+        column_labels=column_labels,
+        compress=compress,
+        variable_value_labels=value_labels,
+        missing_ranges={
+            column: ranges for column, ranges in (meta.missing_ranges or {}).items()
+            if column in written and column not in recoded
+        },
+        variable_measure=measures,
+        variable_format=formats
+    )
+
+    return SavExport(
+        path=path,
+        rows=len(output),
+        columns=len(output.columns),
+        recoded=[column for column in output.columns if column in recoded]
+    )
+
+
+def recoded_sav_bytes(
+    catalog: SavCatalog,
+    recoded_df: pd.DataFrame,
+    recode_settings: dict,
+    name1: str,
+    name2: str,
+    columns: list[str] | None = None
+) -> tuple[bytes, SavExport]:
+    """
+    write_recoded_sav to a temporary file and return its contents for a download.
+
+    Returns:
+        Tuple of (SAV file bytes, SavExport summary)
+    """
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.sav') as tmp_file:
+        tmp_path = tmp_file.name
+    try:
+        export = write_recoded_sav(catalog, recoded_df, recode_settings, name1, name2, tmp_path, columns)
+        with open(tmp_path, 'rb') as f:
+            return f.read(), export
+    finally:
+        os.unlink(tmp_path)
@@ -0,0 +1,187 @@
+"""Process-wide, read-only store of parsed SAV files shared across sessions"""
+import hashlib
+import os
+import threading
+import time
+import weakref
+from typing import Callable, NamedTuple
+import pandas as pd
+from .sav_catalog import SavCatalog
+
+
+DEFAULT_MEMORY_BUDGET_MB = 2048
+
+# Leases hand out shallow copies of the stored DataFrame, which rely on
+# copy-on-write (always on from pandas 3) to keep writes out of the original
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
+
+class SavStoreStats(NamedTuple):
+    """Snapshot of the shared store"""
+    entries: int  # Parsed SAV files currently held
+    referenced: int  # Entries with at least one live session
+    total_bytes: int  # Memory held by all entries
+    budget_bytes: int  # Memory budget before unreferenced entries are evicted
+
+
+class _StoreEntry:
+    """One parsed SAV file plus its bookkeeping"""
+    __slots__ = ('key', 'catalog', 'nbytes', 'refcount', 'last_used')
+
+    def __init__(self, key: str, catalog: SavCatalog, nbytes: int):
+        self.key = key
+        self.catalog = catalog
+        self.nbytes = nbytes
+        self.refcount = 0
+        self.last_used = time.monotonic()
+
+
+class SavLease:
+    """
+    A session's reference to a shared SAV entry.
+
+    catalog is the session's own view of the shared SavCatalog (see
+    SavCatalog.view), so writes to its DataFrame stay in this session.
+
+    The reference is released when release() is called or when the lease is
+    garbage collected (e.g. the Streamlit session that held it goes away).
+    """
+
+    def __init__(self, store: "SharedSavStore", key: str, catalog: SavCatalog):
+        self.key = key
+        self.catalog = catalog
+        self._finalizer = weakref.finalize(self, store._release, key)
+
+    def release(self) -> None:
+        """Drop this session's reference (safe to call more than once)"""
+        self._finalizer()
+
+    @property
+    def released(self) -> bool:
+        return not self._finalizer.alive
+
+
+class SharedSavStore:
+    """
+    Read-only cache of parsed SAV files keyed by a hash of the file contents.
+
+    Sessions that upload the same file get the same SavCatalog (DataFrame,
+    metadata, labels and column stats) instead of each parsing and holding a
+    private copy, so memory grows with the number of distinct files rather
+    than the number of sessions.
+    Entries are reference counted; once the total size exceeds the memory
+    budget, entries no session is using are evicted least recently used first.
+
+    The stored DataFrame is never handed out. Each lease gets a view whose
+    DataFrame is a shallow copy: reads share the stored arrays, and under
+    copy-on-write an in-place write (df.loc[row, column] = value) copies the
+    affected block into that session's frame first, so no session can change
+    the data another one sees.
+    """
+
+    def __init__(self, memory_budget_bytes: int):
+        self._budget = memory_budget_bytes
+        self._entries: dict[str, _StoreEntry] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_key(sav_bytes: bytes) -> str:
+        """Hash identifying a SAV file by its contents"""
+        return hashlib.sha256(sav_bytes).hexdigest()
+
+    def acquire(self, sav_bytes: bytes, loader: Callable[[], dict]) -> SavLease:
+        """
+        Get a lease on the parsed form of a SAV file, parsing it only if needed.
+
+        Args:
+            sav_bytes: Raw contents of the uploaded SAV file
+            loader: Called with no arguments to parse the file on a cache miss;
+                must return the get_essentials_from_sav dictionary
+
+        Returns:
+            SavLease holding a view of the shared SavCatalog
+        """
+        key = self.content_key(sav_bytes)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return self._lease(entry)
+
+        # Parse outside the lock so other sessions are not blocked on a large file
+        catalog = loader()['catalog']
+        nbytes = self._measure(catalog)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _StoreEntry(key, catalog, nbytes)
+                self._entries[key] = entry
+            lease = self._lease(entry)
+            self._evict()
+            return lease
+
+    def stats(self) -> SavStoreStats:
+        with self._lock:
+            return SavStoreStats(
+                entries=len(self._entries),
+                referenced=sum(1 for e in self._entries.values() if e.refcount > 0),
+                total_bytes=sum(e.nbytes for e in self._entries.values()),
+                budget_bytes=self._budget
+            )
+
+    def _lease(self, entry: _StoreEntry) -> SavLease:
+        """Create a lease on an entry (caller holds the lock)"""
+        entry.refcount += 1
+        entry.last_used = time.monotonic()
+        return SavLease(self, entry.key, entry.catalog.view())
+
+    def _release(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refcount = max(entry.refcount - 1, 0)
+            entry.last_used = time.monotonic()
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop unreferenced entries, oldest first, until within budget (caller holds the lock)"""
+        total = sum(e.nbytes for e in self._entries.values())
+        if total <= self._budget:
+            return
+        idle = sorted(
+            (e for e in self._entries.values() if e.refcount == 0),
+            key=lambda e: e.last_used
+        )
+        for entry in idle:
+            if total <= self._budget:
+                break
+            del self._entries[entry.key]
+            total -= entry.nbytes
+
+    @staticmethod
+    def _measure(catalog: SavCatalog) -> int:
+        if catalog.compaction is not None:
+            return catalog.compaction.bytes_after
+        return int(catalog.df.memory_usage(deep=True).sum())
+
+
+_shared_store: SharedSavStore | None = None
+_shared_store_lock = threading.Lock()
+
+
+def get_shared_sav_store() -> SharedSavStore:
+    """
+    Return the process-wide store, creating it on first use.
+
+    The memory budget can be set with the CROSSTAB_SAV_STORE_BUDGET_MB
+    environment variable (default 2048 MB).
+    """
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            budget_mb = int(os.environ.get('CROSSTAB_SAV_STORE_BUDGET_MB', DEFAULT_MEMORY_BUDGET_MB))
+            _shared_store = SharedSavStore(budget_mb * 1024 * 1024)
+        return _shared_store
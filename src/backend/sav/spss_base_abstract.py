@@ -1,6 +1,6 @@
 """Abstract base class for SPSS SAV file processing"""
 from abc import ABC, abstractmethod
-from typing import NamedTuple
+from typing import Iterable, NamedTuple
 
 
 class SPSSResult(NamedTuple):
@@ -19,7 +19,7 @@ class SPSSProcessor(ABC):
     """
     @staticmethod
     @abstractmethod
-    def get_essentials_from_sav(sav_file, name1: str="Plaintiff", name2: str="Defense") -> dict:
+    def get_essentials_from_sav(sav_file, name1: str="Plaintiff", name2: str="Defense", compact: bool = True) -> dict:
         """
         Extract essential data from SAV file for SPSS processing.
         
@@ -27,17 +27,19 @@ class SPSSProcessor(ABC):
             sav_file: Uploaded SAV file (file-like object)
             name1: First party name
             name2: Second party name
+            compact: Store small integer domains in compact dtypes after loading
             
         Returns:
-            Dictionary containing df, meta, sav_labels, and names
+            Dictionary containing the SavCatalog and names
         """
         pass
-    def __init__(self, sav_labels: list[tuple[str, str]], name1: str, name2: str):
+    def __init__(self, sav_labels: Iterable[tuple[str, str]], name1: str, name2: str):
         """
         Initialize SPSS processor.
         
         Args:
-            sav_labels: List of (column_name, label) tuples from SAV file
+            sav_labels: (column_name, label) pairs from the SAV file, either a
+                list of tuples or a SavCatalog
             name1: First party name (e.g., 'Plaintiff', 'Wine Warehouse')
             name2: Second party name (e.g., 'Defense', 'Golden State Cider')
         """
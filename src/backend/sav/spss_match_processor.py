@@ -1,19 +1,157 @@
 """Concrete implementation of SPSSProcessor with matching logic"""
 import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Mapping, NamedTuple
+import numpy as np
+import pandas as pd
 import pyreadstat
 from .spss_base_abstract import SPSSProcessor, SPSSResult
+from .dtype_compaction import compact_survey_frame
+from .column_stats import build_column_stats
+from .sav_catalog import SavCatalog
+from .label_index import LabelIndex, LabelDiff
+from .aho_corasick import AhoCorasick
+from ..text_canonical import canonicalize
+from .label_matcher import LabelMatcher, shared_label_matcher
+from .tfidf_index import LabelSuggestion
+from .match_cache import CachedMatch, MatchCache, get_match_cache
 import io
 
 
+# Bump when a change to matching logic would give different results,
+# so matches cached by an older version are not reused
+MATCHER_VERSION = 3
+
+# Label text marking free-text and contact questions (checked in label text)
+DEFAULT_TEXT_INPUT_PATTERNS = (
+    'first name',
+    'last name',
+    'firstname',
+    'lastname',
+    'enter your name',
+    'please enter',
+    'please type',
+    'address',
+    'email',
+    'phone',
+    'zip code',
+    'zipcode',
+    'city',
+    'state',
+    'comments'
+)
+
+# Metadata fields (checked in column names)
+DEFAULT_METADATA_COLUMNS = frozenset({
+    'firstname',
+    'lastname',
+    'first_name',
+    'last_name',
+    'j_number',
+    'final_leaning',
+    'email',
+    'phone',
+    'address',
+    'zipcode',
+    'zip_code'
+})
+
+# get_all_general_questions results keyed by (labels fingerprint, patterns, metadata columns)
+_GENERAL_QUESTIONS_CACHE_SIZE = 64
+_general_questions_cache: OrderedDict[tuple, tuple[tuple[str, str], ...]] = OrderedDict()
+_general_questions_lock = threading.Lock()
+
+
+class LabelUpdate(NamedTuple):
+    """What changed between two versions of a SAV file's labels"""
+    diff: LabelDiff  # Added, removed and relabelled columns
+    rematched: dict[str, str | None]  # Statements that were matched again -> new column
+
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_SPACE_AFTER_HYPHEN_RE = re.compile(r'-\s+')
+_SPACE_BEFORE_HYPHEN_RE = re.compile(r'\s+-')
+
+
 class SPSSMatchProcessor(SPSSProcessor):
     """
     Concrete SPSS processor that handles question matching.
     
     Provides the core matching functionality using your existing logic
     for text normalization and column finding.
+    
+    Questions with no exact or substring match fall back to fuzzy matching;
+    the confidence of every match is available from get_match_confidence().
+    
+    Non-exact results are remembered in a MatchCache keyed by a fingerprint
+    of the labels, so the same statements against the same SAV file are only
+    matched once across reruns, sessions and restarts.
+    
+    The label mapping and indexes live in a LabelMatcher shared by every
+    processor on the same labels, so creating a processor per rerun is cheap.
     """
     
-    def _build_label_mapping(self) -> dict[str, str]:
+    FUZZY_MATCH_THRESHOLD = 0.85  # Lowest similarity accepted as a fuzzy match
+    FUZZY_CANDIDATES = 20  # Labels scored per fuzzy lookup
+    
+    def __init__(
+        self,
+        sav_labels,
+        name1: str,
+        name2: str,
+        match_cache: MatchCache | None = None,
+        previous: "SPSSMatchProcessor | None" = None
+    ):
+        """
+        Args:
+            sav_labels: (column_name, label) pairs, e.g. a SavCatalog
+            name1: First party name
+            name2: Second party name
+            match_cache: Cache to consult before matching; defaults to the
+                process-wide get_match_cache()
+            previous: Processor for an earlier version of the same SAV file;
+                if these labels have no matcher yet, its index is updated
+                with just the changed labels instead of being rebuilt
+        """
+        self._previous_matcher = previous._matcher if previous is not None else None
+        # SPSSProcessor.__init__ calls _build_label_mapping, which sets self._matcher
+        super().__init__(sav_labels, name1, name2)
+        self._previous_matcher = None  # do not keep the old version's index alive
+        self._label_index = self._matcher.label_index
+        self._labels_fingerprint = self._matcher.fingerprint
+        self._match_confidence: dict[str, float] = {}
+        self._match_cache = match_cache if match_cache is not None else get_match_cache()
+    
+    @property
+    def labels_fingerprint(self) -> str:
+        """Hash of the labels and matcher settings that keys cached matches"""
+        return self._labels_fingerprint
+    
+    def _build_label_mapping(self) -> Mapping[str, str]:
+        """Read-only label -> column mapping from the matcher shared for these labels"""
+        self._matcher = shared_label_matcher(self._sav_labels, self._matcher_salt(), self._build_matcher)
+        return self._matcher.label_to_column
+    
+    def _matcher_salt(self) -> str:
+        """Everything besides the labels that changes how labels are matched"""
+        cls = type(self)
+        return (
+            f"{MATCHER_VERSION}:{cls.FUZZY_MATCH_THRESHOLD}:{cls.FUZZY_CANDIDATES}:"
+            f"{cls._map_labels.__qualname__}:{cls._normalize_text.__qualname__}"
+        )
+    
+    def _build_matcher(self, fingerprint: str) -> LabelMatcher:
+        mapping = self._map_labels()
+        if self._previous_matcher is not None:
+            # Only added and relabelled entries are normalised and indexed
+            index, _ = self._previous_matcher.label_index.updated(mapping, self._normalize_text)
+        else:
+            # Normalise every label once; lookups only verify trigram candidates
+            index = LabelIndex(mapping, self._normalize_text)
+        return LabelMatcher(fingerprint, mapping, index)
+    
+    def _map_labels(self) -> dict[str, str]:
         mapping: dict[str, str] = {}
         for column, label in self._sav_labels:
             if label not in mapping:
@@ -26,7 +164,7 @@ class SPSSMatchProcessor(SPSSProcessor):
     
     def _normalize_text(self, text: str) -> str:
         """
-        Normalize whitespace and hyphens for consistent matching.
+        Normalize Unicode details, whitespace and hyphens for consistent matching.
         
         Args:
             text: Raw text to normalize
@@ -34,26 +172,190 @@ class SPSSMatchProcessor(SPSSProcessor):
         Returns:
             Normalized text
         """
-        text = re.sub(r'\s+', ' ', text)  # Multiple spaces -> single space
-        text = re.sub(r'-\s+', '-', text)  # Space after hyphen -> no space
-        text = re.sub(r'\s+-', '-', text)  # Space before hyphen -> no space
+        text = canonicalize(text)  # quotes, dashes, ligatures, invisible characters
+        text = _WHITESPACE_RE.sub(' ', text)  # Multiple spaces -> single space
+        text = _SPACE_AFTER_HYPHEN_RE.sub('-', text)  # Space after hyphen -> no space
+        text = _SPACE_BEFORE_HYPHEN_RE.sub('-', text)  # Space before hyphen -> no space
         return text.strip()
     
     def _find_column(self, question: str) -> str | None:
-        if question in self._label_to_column:
-            col = self._label_to_column[question]
-            if not col.lower().endswith('.r'):
-                return col
-        
-        normalized_question = self._normalize_text(question)
-        for label, column in self._label_to_column.items():
-            if column.lower().endswith('.r'):
-                continue  # skip already-recoded columns
-            if normalized_question in self._normalize_text(label):
-                return column
+        col = self._exact_column(question)
+        if col is not None:
+            return self._record_match(question, CachedMatch(col, 1.0))
         
+        # Everything past the exact lookup depends only on the normalised text
+        normalized = self._normalize_text(question)
+        match = self._match_cache.get(self._labels_fingerprint, normalized)
+        if match is None:
+            # Partial match against the precomputed index (already-recoded columns excluded)
+            col = self._label_index.find(normalized)
+            match = CachedMatch(col, 1.0) if col is not None else self._fuzzy_match(question)
+            self._match_cache.put(self._labels_fingerprint, normalized, match)
+        return self._record_match(question, match)
+    
+    def _fuzzy_match(self, question: str) -> CachedMatch:
+        """
+        Approximate match for a question with no exact or substring match.
+        
+        Catches PDF extraction differences (ligatures, smart quotes, broken
+        hyphenation, truncated labels). The similarity score becomes the
+        match confidence.
+        """
+        match = self._label_index.fuzzy_find(
+            question, self.FUZZY_MATCH_THRESHOLD, self.FUZZY_CANDIDATES
+        )
+        if match is None:
+            return CachedMatch(None, None)
+        return CachedMatch(match.column, match.score)
+    
+    def _record_match(self, question: str, match: CachedMatch) -> str | None:
+        """Track the confidence of a match and return its column"""
+        if match.column is None:
+            self._match_confidence.pop(question, None)
+        else:
+            self._match_confidence[question] = match.confidence
+        return match.column
+    
+    def get_match_confidence(self, question: str) -> float | None:
+        """
+        Confidence of the last match found for a question.
+        
+        Returns:
+            1.0 for exact and substring matches, the similarity score (0-1) for
+            fuzzy matches, or None if the question was not matched
+        """
+        return self._match_confidence.get(question)
+    
+    def _exact_column(self, question: str) -> str | None:
+        """Column whose label is exactly the question, unless it is a .r column"""
+        col = self._label_to_column.get(question)
+        if col is not None and not col.lower().endswith('.r'):
+            return col
         return None
     
+    def match_many(self, questions: list[str]) -> dict[str, str | None]:
+        """
+        Find SAV columns for a batch of questions in one pass over the labels.
+        
+        Same result as calling _find_column on each question (exact match
+        first, then the match cache, then the first label containing the
+        normalised question, then the fuzzy fallback), but all partial
+        matches share a single scan of the label corpus.
+        
+        Args:
+            questions: Question texts to look up
+            
+        Returns:
+            Dictionary mapping each question to its column name or None
+            Example: {"Do you think Bob ate the cookie": "Q32", "Unknown": None}
+        """
+        matches: dict[str, str | None] = {}
+        pending: dict[str, list[str]] = {}  # normalised text -> questions
+        for question in questions:
+            if question in matches:
+                continue
+            column = self._exact_column(question)
+            if column is not None:
+                matches[question] = self._record_match(question, CachedMatch(column, 1.0))
+                continue
+            normalized = self._normalize_text(question)
+            cached = self._match_cache.get(self._labels_fingerprint, normalized)
+            if cached is not None:
+                matches[question] = self._record_match(question, cached)
+                continue
+            matches[question] = None  # filled in below; keeps the input order
+            pending.setdefault(normalized, []).append(question)
+        
+        if not pending:
+            return matches
+        
+        found: dict[str, CachedMatch] = {}
+        columns = self._label_index.find_many(list(pending))
+        for normalized, column in zip(pending, columns):
+            if column is not None:
+                found[normalized] = CachedMatch(column, 1.0)
+            else:
+                found[normalized] = self._fuzzy_match(pending[normalized][0])
+        self._match_cache.put_many(self._labels_fingerprint, found)
+        
+        for normalized, match in found.items():
+            for question in pending[normalized]:
+                matches[question] = self._record_match(question, match)
+        return matches
+    
+    def suggest_columns(self, statements: list[str], k: int = 5) -> dict[str, list[LabelSuggestion]]:
+        """
+        Rank candidate columns for statements, e.g. ones that could not be matched.
+        
+        Scores every statement against every label (TF-IDF over words and
+        word pairs, cosine similarity) in one batched sparse product, so a
+        whole list of unmatched statements costs about the same as one.
+        
+        Args:
+            statements: Statements to find candidates for
+            k: Suggestions per statement
+            
+        Returns:
+            Dictionary mapping each statement to up to k LabelSuggestion
+            (column, label, score), best first
+        """
+        unique = list(dict.fromkeys(statements))
+        return dict(zip(unique, self._matcher.tfidf_index.top_k(unique, k)))
+    
+    def rematch_after_update(
+        self,
+        previous: "SPSSMatchProcessor",
+        matches: dict[str, str | None],
+        confidences: dict[str, float | None] | None = None
+    ) -> LabelUpdate:
+        """
+        Re-match only the statements a new version of the SAV file could affect.
+        
+        Diffs the labels against the previous version. A statement is matched
+        again if its column was removed or relabelled, if its normalised text
+        occurs in an added or relabelled label (which may now be the first
+        match), or, when labels were added, if it was unmatched or only fuzzy
+        matched. If surviving labels were reordered, every statement is
+        matched again, since the first matching label may have changed.
+        
+        Args:
+            previous: Processor built on the previous version's labels
+            matches: Statement -> column found against the previous version
+            confidences: Statement -> match confidence from the previous
+                version; defaults to previous.get_match_confidence(). Unknown
+                confidences count as fuzzy
+            
+        Returns:
+            LabelUpdate with the diff and the new column of every re-matched statement
+        """
+        diff = previous._label_index.diff(self._label_to_column)
+        if diff.is_empty:
+            return LabelUpdate(diff, {})
+        
+        if diff.reordered:
+            return LabelUpdate(diff, self.match_many(list(matches)))
+        
+        if confidences is None:
+            confidences = {statement: previous.get_match_confidence(statement) for statement in matches}
+        stale = {column for column, _ in diff.removed} | {column for column, _, _ in diff.changed}
+        new_labels = [label for _, label in diff.added] + [label for _, _, label in diff.changed]
+        
+        normalized = {statement: self._normalize_text(statement) for statement in matches}
+        contained: set[str] = set()
+        patterns = list({text for text in normalized.values() if text})
+        if new_labels and patterns:
+            automaton = AhoCorasick(patterns)
+            for label in new_labels:
+                contained.update(patterns[i] for i in automaton.find_in(self._normalize_text(label)))
+        
+        affected = [
+            statement for statement, column in matches.items()
+            if column in stale
+            or normalized[statement] in contained
+            or (new_labels and (column is None or confidences.get(statement) != 1.0))
+        ]
+        return LabelUpdate(diff, self.match_many(affected))
+    
     def find_all_matches(
         self, 
         name1_questions: list[str], 
@@ -70,10 +372,11 @@ class SPSSMatchProcessor(SPSSProcessor):
             SPSSResult with matched and unmatched questions
         """
         self.reset_tracking()
+        matches = self.match_many(list(name1_questions) + list(name2_questions))
         
         # Process name1 questions
         for question in name1_questions:
-            column = self._find_column(question)
+            column = matches[question]
             if column:
                 self._matched.append((self._name1, question))
             else:
@@ -81,90 +384,74 @@ class SPSSMatchProcessor(SPSSProcessor):
         
         # Process name2 questions
         for question in name2_questions:
-            column = self._find_column(question)
+            column = matches[question]
             if column:
                 self._matched.append((self._name2, question))
             else:
                 self._unmatched.append((self._name2, question))
         
         return self.get_result()
-    def get_all_general_questions(self) -> list[tuple[str, str]]:
+    def get_all_general_questions(
+        self,
+        text_input_patterns: Iterable[str] | None = None,
+        metadata_columns: Iterable[str] | None = None
+    ) -> list[tuple[str, str]]:
         """
         Get all general questions (questions before party-specific questions).
         
+        The filters run as vectorised string operations over the column and
+        label arrays, with the text input patterns joined into one regex
+        alternation. The result is memoised per label set and filter settings,
+        so repeated calls for the same SAV file (every recode-settings
+        initialisation) do no work.
+        
         Args:
-            name1: First party identifier (default "Plaaffs")
-            name2: Second party identifier (default "Defaffs")
+            text_input_patterns: Label substrings marking free-text/contact
+                questions to skip, case-insensitive (default DEFAULT_TEXT_INPUT_PATTERNS)
+            metadata_columns: Column names to skip, case-insensitive
+                (default DEFAULT_METADATA_COLUMNS)
             
         Returns:
             List of tuples (column_name, label)
             example: [("Q1", "How satisfied are you?"), ("Q2", "Please enter your age")]
         """
-        general_questions = []
-        
-        # Text patterns to exclude (check in label text)
-        text_input_patterns = [
-            'first name',
-            'last name',
-            'firstname', 
-            'lastname',
-            'enter your name',
-            'please enter',
-            'please type',
-            'address',
-            'email',
-            'phone',
-            'zip code',
-            'zipcode',
-            'city',
-            'state',
-            'comments'
-        ]
+        patterns = tuple(sorted({
+            p.lower() for p in (DEFAULT_TEXT_INPUT_PATTERNS if text_input_patterns is None else text_input_patterns)
+        }))
+        metadata = frozenset(
+            c.lower() for c in (DEFAULT_METADATA_COLUMNS if metadata_columns is None else metadata_columns)
+        )
+        key = (self._labels_fingerprint, patterns, metadata)
         
-        # Metadata fields to exclude (check in column names)
-        metadata_columns = {
-            'firstname',
-            'lastname', 
-            'first_name',
-            'last_name',
-            'j_number',
-            'final_leaning',
-            'email',
-            'phone',
-            'address',
-            'zipcode',
-            'zip_code'
-        }
+        with _general_questions_lock:
+            cached = _general_questions_cache.get(key)
+            if cached is not None:
+                _general_questions_cache.move_to_end(key)
+                return list(cached)
         
-        for column, label in self._sav_labels:
-            if label is None:
-                break
-            # Lowercase for comparison 
-            col_lower = column.lower()
-            label_lower = label.lower()
-            # Check if column name matches metadata patterns
-            if col_lower in metadata_columns:
-                continue
-            # Skip already-recoded columns
-            if col_lower.endswith('.r'):
-                continue
-                        
-            # Check if label contains text input patterns
-            skip = False
-            for pattern in text_input_patterns:
-                if pattern in label_lower:
-                    skip = True
-                    break
-            
-            if skip:
-                continue
-            
-            # Add to general questions
-            general_questions.append((column, label))
+        pairs = list(self._sav_labels)
+        # General questions end at the first unlabelled column
+        stop = next((i for i, (_, label) in enumerate(pairs) if label is None), len(pairs))
+        pairs = pairs[:stop]
+        
+        columns = pd.Series([column for column, _ in pairs], dtype='string').str.lower()
+        labels = pd.Series([label for _, label in pairs], dtype='string').str.lower()
         
+        # Skip metadata fields and already-recoded columns
+        skip = columns.isin(metadata) | columns.str.endswith('.r')
+        if patterns:  # an empty alternation would match every label
+            # Skip labels containing any text input pattern
+            skip |= labels.str.contains('|'.join(map(re.escape, patterns)), regex=True)
+        
+        general_questions = [pairs[i] for i in np.flatnonzero(~skip.to_numpy(dtype=bool))]
+        
+        with _general_questions_lock:
+            _general_questions_cache[key] = tuple(general_questions)
+            while len(_general_questions_cache) > _GENERAL_QUESTIONS_CACHE_SIZE:
+                _general_questions_cache.popitem(last=False)
         return general_questions
     @staticmethod
-    def get_essentials_from_sav(sav_file, name1: str, name2: str) -> dict:
+    def get_essentials_from_sav(sav_file, name1: str, name2: str, compact: bool = True) -> dict:
         """
         Extract essential data from SAV file for SPSS processing.
         
@@ -172,9 +459,12 @@ class SPSSMatchProcessor(SPSSProcessor):
             sav_file: Uploaded SAV file (file-like object or path)
             name1: First party name
             name2: Second party name
+            compact: Store small integer columns as int8 / nullable Int8 and
+                low-cardinality text columns as Categorical
             
         Returns:
-            Dictionary containing df, meta, sav_labels, and names
+            Dictionary containing the SavCatalog (df, meta, labels, column
+            stats, compaction report) and the party names
         """
         import pyreadstat
         import tempfile
@@ -195,18 +485,84 @@ class SPSSMatchProcessor(SPSSProcessor):
             # It's already a path string
             df, meta = pyreadstat.read_sav(sav_file)
         
-        # Extract sav_labels as list of (column_name, label) tuples
-        sav_labels = []
-        for col in df.columns:
-            label = meta.column_names_to_labels.get(col, col)
-            if 'Q127_8' in col:
-                print(f"  {col!r} -> {label!r}")
-            sav_labels.append((col, label))
+        compaction = None
+        if compact:
+            df, compaction = compact_survey_frame(df)
+        
+        # Columns and labels are stored once in the catalog; iterating it
+        # yields the (column_name, label) pairs the processors expect
+        catalog = SavCatalog(df, meta, build_column_stats(df, meta), compaction)
         
         return {
-            'df': df,
-            'meta': meta,
-            'sav_labels': sav_labels,
+            'catalog': catalog,
             'name1': name1,
             'name2': name2
-        }
\ No newline at end of file
+        }
+
+def rematch_recode_settings(
+    previous_catalog,
+    catalog,
+    name1: str,
+    name2: str,
+    recode_settings: dict[str, dict],
+    neutral_questions: dict[str, dict],
+    rebuild: Callable[[dict, str | None, float | None], dict]
+) -> LabelUpdate:
+    """
+    Bring existing recode settings in line with a new version of the SAV file.
+    
+    Only statements whose match could have changed are matched again (see
+    SPSSMatchProcessor.rematch_after_update); rebuild makes their settings
+    for the new column, unless the column stayed the same, in which case only
+    the confidence is updated. Neutral settings (keyed by label) whose column
+    was removed or relabelled are pointed at the column that now carries
+    their label, or dropped; affected neutral_questions entries are dropped
+    so they are rebuilt from the new file.
+    
+    Args:
+        previous_catalog: Labels of the version the settings were built on
+        catalog: Labels of the new version
+        name1: First party name
+        name2: Second party name
+        recode_settings: Statement -> recode config, updated in place
+        neutral_questions: Label -> neutral question config, updated in place
+        rebuild: (old config, new column or None, confidence) -> new config
+        
+    Returns:
+        LabelUpdate with the label diff and every re-matched statement
+    """
+    previous = SPSSMatchProcessor(sav_labels=previous_catalog, name1=name1, name2=name2)
+    processor = SPSSMatchProcessor(sav_labels=catalog, name1=name1, name2=name2, previous=previous)
+    party_statements = {
+        statement: config.get('matched_column')
+        for statement, config in recode_settings.items()
+        if config.get('party') in ('name1', 'name2')
+    }
+    update = processor.rematch_after_update(
+        previous,
+        party_statements,
+        {statement: recode_settings[statement].get('match_confidence') for statement in party_statements}
+    )
+    
+    for statement, column in update.rematched.items():
+        confidence = processor.get_match_confidence(statement)
+        if column is not None and column == party_statements[statement]:
+            recode_settings[statement]['match_confidence'] = confidence
+        else:
+            recode_settings[statement] = rebuild(recode_settings[statement], column, confidence)
+    
+    stale = {column for column, _ in update.diff.removed} | {column for column, _, _ in update.diff.changed}
+    for label, config in list(recode_settings.items()):
+        if config.get('party') != 'neutral' or config.get('matched_column') not in stale:
+            continue
+        column = processor._exact_column(label)
+        if column is None:
+            del recode_settings[label]  # the question is no longer in the file
+        else:
+            config['matched_column'] = column
+            config['column'] = column
+    for label, config in list(neutral_questions.items()):
+        if config.get('matched_column') in stale:
+            del neutral_questions[label]
+    
+    return update
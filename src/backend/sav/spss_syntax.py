@@ -1,26 +1,162 @@
 from typing import NamedTuple
 from .spss_match_processor import SPSSMatchProcessor
+from .match_cache import MatchCache
+from .recode_plan import ColumnRule, RecodeRange, LOWEST, HIGHEST, compile_rule, settings_key
+from .syntax_writer import SyntaxWriter
 
 
 class RecodeResult(NamedTuple):
     """Result from generating SPSS recode script"""
-    script: str
     matched: list[tuple[str, str]]
     unmatched: list[tuple[str, str]]
+    writer: SyntaxWriter | None = None  # Writer the script went to (preview / download)
+
+    @property
+    def script(self) -> str:
+        """
+        Whole script, or "" when it was written to an external stream.
+
+        Decoded from the writer on each access; the writer's buffer is the
+        only copy kept, so use writer.to_bytes() / writer.preview() to serve it.
+        """
+        if self.writer is None or not self.writer.in_memory:
+            return ""
+        return self.writer.getvalue()
+
+
+class RecodeBlock(NamedTuple):
+    """One question's recode before it is written out"""
+    column: str
+    ranges: str  # Range rules, e.g. "(1 thru 2=2) (3 thru 4=1)"
+    variable_label: str  # Label text for column.r, e.g. "Recode: question"
+    extra_labels: tuple[tuple[int, str], ...] = ()  # Value labels beyond 1/2, e.g. ((3, "Neutral"),)
+
+
+def _quote(text: str) -> str:
+    """SPSS string literal; embedded apostrophes are doubled"""
+    return "'" + str(text).replace("'", "''") + "'"
+
+
+def _wrap_names(names: list[str], per_line: int = 8) -> str:
+    """Variable list split over several lines so no syntax line gets too long"""
+    lines = [' '.join(names[i:i + per_line]) for i in range(0, len(names), per_line)]
+    return '\n    '.join(lines)
+
+
+def _value_spec(rule_range: RecodeRange) -> str:
+    """Closed SPSS value range, e.g. "1 thru 3", "LOWEST thru 50" or "4" """
+    if rule_range.low == rule_range.high:
+        return f"{rule_range.low}"
+    low = "LOWEST" if rule_range.low == LOWEST else f"{rule_range.low}"
+    high = "HIGHEST" if rule_range.high == HIGHEST else f"{rule_range.high}"
+    return f"{low} thru {high}"
+
+
+def _spss_lookup(rule: ColumnRule) -> str:
+    """RECODE value lists for a lookup rule: response codes grouped by output code, e.g. "(1 2=2) (3=3)" """
+    groups: dict[int, list[str]] = {}
+    for code, becomes in rule.lookup:
+        groups.setdefault(becomes, []).append(f"{code}")
+    specs = [f"({' '.join(codes)}={becomes})" for becomes, codes in groups.items()]
+    if rule.sysmis_becomes is not None:
+        specs.append(f"(SYSMIS={rule.sysmis_becomes})")
+    return ' '.join(specs)
+
+
+def _spss_ranges(rule: ColumnRule) -> str:
+    """
+    RECODE value specifications for a compiled rule.
+
+    SPSS ranges are closed and RECODE takes the first specification that
+    matches, so an open bound is made exact by handing its end point to
+    whichever rule the plan gives it before the open range is written:
+    nothing when an earlier range already holds it, otherwise
+    (point=code) for the later range that does, or (point=SYSMIS).
+    """
+    if rule.mode == 'lookup':
+        return _spss_lookup(rule)
+    specs = []
+    claimed = set()  # End points already given a spec
+    for position, rule_range in enumerate(rule.ranges):
+        open_points = []
+        if not rule_range.low_inclusive and rule_range.low != LOWEST:
+            open_points.append(rule_range.low)
+        if not rule_range.high_inclusive and rule_range.high != HIGHEST:
+            open_points.append(rule_range.high)
+        for point in open_points:
+            owner = next((i for i, other in enumerate(rule.ranges) if other.contains(point)), None)
+            if point in claimed or (owner is not None and owner < position):
+                continue
+            claimed.add(point)
+            becomes = rule.ranges[owner].becomes if owner is not None else "SYSMIS"
+            specs.append(f"({point}={becomes})")
+        specs.append(f"({_value_spec(rule_range)}={rule_range.becomes})")
+    if rule.sysmis_becomes is not None:
+        specs.append(f"(SYSMIS={rule.sysmis_becomes})")
+    return ' '.join(specs)
 
 
 class SPSSSyntaxGenerator(SPSSMatchProcessor):
     """
     SPSS syntax generator that inherits matching logic.
     Generates recode syntax including optional SYSMIS handling.
+
+    By default every question gets its own RECODE and EXECUTE. Consolidated
+    mode groups questions with identical rules into multi-variable RECODE
+    commands and ends with a single EXECUTE, so SPSS reads the data once.
+
+    Given a block cache, each question's block is memoised on its column,
+    question, party names and syntax settings, so a rerun after one setting
+    changed regenerates one block and splices the rest from the cache.
     """
 
-    def __init__(self, sav_labels: list[tuple[str, str]], name1: str = "Plaintiff", name2: str = "Defense"):
-        super().__init__(sav_labels, name1, name2)
-        self._script = ""
+    def __init__(
+        self,
+        sav_labels: list[tuple[str, str]],
+        name1: str = "Plaintiff",
+        name2: str = "Defense",
+        match_cache: MatchCache | None = None
+    ):
+        super().__init__(sav_labels, name1, name2, match_cache)
+        self._writer = SyntaxWriter()
+        self._consolidated = False
+        self._blocks: list[RecodeBlock] = []
+        self._block_cache: dict[tuple, list] | None = None
+        self._used_blocks: dict[tuple, list] = {}
+        self.blocks_regenerated = 0  # Blocks built (not taken from the cache) by the last call
+
+    def generate_recode_script(
+        self,
+        name1_questions: list[str],
+        name2_questions: list[str],
+        recode_settings: dict[str, dict[str, int]],
+        writer: SyntaxWriter | None = None,
+        consolidated: bool = False,
+        block_cache: dict | None = None
+    ) -> RecodeResult:
+        """
+        Generate recode syntax for every matched question.
 
-    def generate_recode_script(self, name1_questions: list[str], name2_questions: list[str], recode_settings: dict[str, dict[str, int]]) -> RecodeResult:
-        self._script = ""
+        Args:
+            name1_questions: Highlighted statements for the first party
+            name2_questions: Highlighted statements for the second party
+            recode_settings: Per-question recode settings from the UI
+            writer: Where to write the syntax; None collects it in memory
+            consolidated: Group identical recodes into multi-variable RECODE
+                commands, batch the labels and end with one EXECUTE
+            block_cache: Dictionary kept between calls (e.g. in session state)
+                to memoise each question's block; afterwards it holds only
+                the blocks this call used
+
+        Returns:
+            RecodeResult with the matches and the writer holding the script
+        """
+        self._writer = writer if writer is not None else SyntaxWriter()
+        self._consolidated = consolidated
+        self._blocks = []
+        self._block_cache = block_cache
+        self._used_blocks = {}
+        self.blocks_regenerated = 0
         self.reset_tracking()
 
         self._process_questions(name1_questions, self._name1, recode_settings)
@@ -32,19 +168,47 @@ class SPSSSyntaxGenerator(SPSSMatchProcessor):
         ]
         self._process_questions(neutral_questions, 'Neutral', recode_settings)
 
-        return RecodeResult(script=self._script, matched=self._matched, unmatched=self._unmatched)
+        if consolidated:
+            self._write_consolidated(self._blocks)
+            self._blocks = []
+
+        if block_cache is not None:
+            # Drop blocks for questions and settings that no longer exist
+            block_cache.clear()
+            block_cache.update(self._used_blocks)
+        self._used_blocks = {}
+
+        return RecodeResult(
+            matched=self._matched,
+            unmatched=self._unmatched,
+            writer=self._writer
+        )
 
     def _process_questions(self, questions: list[str], category: str, recode_settings: dict[str, dict[str, int]]) -> None:
+        # Settings created by the recode UI already carry their match result
+        # (matched_column, None when unmatched), so only settings built
+        # elsewhere without one need a lookup. Questions without settings
+        # are unmatched whatever their column.
+        matches = self.match_many([
+            question for question in questions
+            if question in recode_settings and 'matched_column' not in recode_settings[question]
+        ])
         for question in questions:
-            if question in recode_settings and recode_settings[question].get('matched_column'):
-                column = recode_settings[question]['matched_column']
+            if question in matches:
+                column = matches[question]
             else:
-                column = self._find_column(question)
+                column = recode_settings.get(question, {}).get('matched_column')
 
             if column and question in recode_settings:
-                syntax = self._generate_recode_syntax(column, question, recode_settings[question])
-                if syntax:
-                    self._script += syntax
+                entry = self._cached_block(column, question, recode_settings[question])
+                block = entry[0]
+                if block is not None:
+                    if self._consolidated:
+                        self._blocks.append(block)  # written together at the end
+                    else:
+                        if entry[1] is None:
+                            entry[1] = self._format_block(block)
+                        self._writer.write(entry[1])
                     self._matched.append((category, question))
                 else:
                     self._unmatched.append((category, question))
@@ -57,62 +221,87 @@ class SPSSSyntaxGenerator(SPSSMatchProcessor):
         Returns None if all ranges (including sysmis) map to None — nothing to generate.
         Adds (SYSMIS={value}) clause only when sysmis_becomes is explicitly set.
         """
-        variable_type = settings.get('variable_type', 'categorical')
-        r1_becomes = settings.get('range1_becomes')
-        r2_becomes = settings.get('range2_becomes')
-        sysmis_becomes = settings.get('sysmis_becomes')
-
-        # Nothing to generate at all
-        if r1_becomes is None and r2_becomes is None and sysmis_becomes is None:
-            return None
-
-        if variable_type == 'continuous':
-            range1 = self._operator_to_spss_range(settings['range1_operator'], settings['range1_value'])
-            range2 = self._operator_to_spss_range(settings['range2_operator'], settings['range2_value'])
-
-            ranges = ""
-            if r1_becomes is not None:
-                ranges += f"({range1}={r1_becomes}) "
-            if r2_becomes is not None:
-                ranges += f"({range2}={r2_becomes}) "
-            if sysmis_becomes is not None:
-                ranges += f"(SYSMIS={sysmis_becomes}) "
-
-            return (
-                f"recode {column} {ranges.strip()} into {column}.r.\n"
-                f"variable labels {column}.r '{question}'.\n"
-                f"value labels {column}.r 1 '{self._name1}' 2 '{self._name2}'.\n"
-                f"execute.\n\n"
-            )
-        else:
-            ranges = ""
-            if r1_becomes is not None:
-                ranges += f"({settings['range1_start']} thru {settings['range1_end']}={r1_becomes}) "
-            if r2_becomes is not None:
-                ranges += f"({settings['range2_start']} thru {settings['range2_end']}={r2_becomes}) "
-            if sysmis_becomes is not None:
-                ranges += f"(SYSMIS={sysmis_becomes}) "
-
-            return (
-                f"recode {column} {ranges.strip()} into {column}.r.\n"
-                f"variable labels {column}.r Recode: '{question}'.\n"
-                f"value labels {column}.r 1 '{self._name1}' 2 '{self._name2}'.\n"
-                f"execute.\n\n"
+        block = self._recode_block(column, question, settings)
+        return self._format_block(block) if block is not None else None
+
+    def _cached_block(self, column: str, question: str, settings: dict[str, int]) -> list:
+        """
+        [RecodeBlock or None, formatted text or None] for a question, from the
+        block cache when its column, names and syntax settings are unchanged.
+        """
+        key = (column, question, self._name1, self._name2, settings_key(settings))
+        entry = self._used_blocks.get(key)
+        if entry is None and self._block_cache is not None:
+            entry = self._block_cache.get(key)
+        if entry is None:
+            entry = [self._recode_block(column, question, settings), None]
+            self.blocks_regenerated += 1
+        self._used_blocks[key] = entry
+        return entry
+
+    def _recode_block(self, column: str, question: str, settings: dict[str, int]) -> RecodeBlock | None:
+        """Range rules and variable label for one question, or None if nothing maps"""
+        rule = compile_rule(question, column, settings)
+        if isinstance(rule, str):
+            return None  # unknown variable type or nothing mapped
+        return RecodeBlock(column, _spss_ranges(rule), rule.variable_label, rule.extra_labels)
+
+    def _format_block(self, block: RecodeBlock) -> str:
+        """One question's recode as its own RECODE / labels / EXECUTE block"""
+        return (
+            f"recode {block.column} {block.ranges} into {block.column}.r.\n"
+            f"variable labels {block.column}.r {_quote(block.variable_label)}.\n"
+            f"value labels {block.column}.r {self._value_labels(block)}.\n"
+            f"execute.\n\n"
+        )
+
+    def _write_consolidated(self, blocks: list[RecodeBlock]) -> None:
+        """
+        Write all recodes as grouped commands with a single EXECUTE.
+
+        Questions with identical range rules share one multi-variable
+        RECODE ... INTO command, then all variable labels and value labels
+        are set in one command each. SPSS only passes over the data once, at
+        the final EXECUTE, instead of once per question.
+        """
+        # A column recoded twice keeps its last rules, as in the per-question output
+        latest: dict[str, RecodeBlock] = {}
+        for block in blocks:
+            latest.pop(block.column, None)
+            latest[block.column] = block
+        if not latest:
+            return
+
+        groups: dict[str, list[str]] = {}
+        for block in latest.values():
+            groups.setdefault(block.ranges, []).append(block.column)
+
+        for ranges, columns in groups.items():
+            self._writer.write(
+                f"recode {_wrap_names(columns)} {ranges}\n"
+                f"    into {_wrap_names([f'{column}.r' for column in columns])}.\n"
             )
 
-    def _operator_to_spss_range(self, operator: str, value: float) -> str:
-        """Convert operator and value to SPSS range syntax"""
-        if operator == '<':
-            return f"LOWEST thru {value - 0.01}"
-        elif operator == '<=':
-            return f"LOWEST thru {value}"
-        elif operator == '=':
-            return f"{value}"
-        elif operator == '>=':
-            return f"{value} thru HIGHEST"
-        elif operator == '>':
-            return f"{value + 0.01} thru HIGHEST"
-        return str(value)
+        self._writer.write(
+            "variable labels "
+            + "\n    /".join(f"{block.column}.r {_quote(block.variable_label)}" for block in latest.values())
+            + ".\n"
+        )
+        # Columns sharing the same value labels are listed together
+        label_groups: dict[str, list[str]] = {}
+        for block in latest.values():
+            label_groups.setdefault(self._value_labels(block), []).append(f"{block.column}.r")
+        self._writer.write(
+            "value labels "
+            + "\n    /".join(f"{_wrap_names(names)} {labels}" for labels, names in label_groups.items())
+            + ".\n"
+            "execute.\n"
+        )
+
+    def _value_labels(self, block: RecodeBlock) -> str:
+        """Value label pairs for a .r variable: the two parties plus any extra output codes"""
+        pairs = [(1, self._name1), (2, self._name2), *block.extra_labels]
+        return ' '.join(f"{code} {_quote(label)}" for code, label in pairs)
 
     def get_script(self) -> str:
-        return self._script
\ No newline at end of file
+        return self._writer.getvalue()
\ No newline at end of file
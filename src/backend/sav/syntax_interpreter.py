@@ -0,0 +1,442 @@
+"""Interpreter for the SPSS syntax subset the generator writes, run against the survey DataFrame"""
+import re
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+
+
+class SpssSyntaxError(ValueError):
+    """Syntax the interpreter cannot parse or run (SPSS would reject it too)"""
+
+    def __init__(self, message: str, line: int | None = None):
+        super().__init__(f"line {line}: {message}" if line is not None else message)
+        self.line = line
+
+
+class _Token(NamedTuple):
+    kind: str  # 'word', 'number', 'string', 'punct' or 'end' (command terminator)
+    text: str
+    line: int
+
+
+class _Rule(NamedTuple):
+    """One (value list = target) specification of a RECODE"""
+    intervals: list[tuple[float, float]]  # Closed ranges; LOWEST/HIGHEST are -inf/inf
+    sysmis: bool  # SYSMIS or MISSING in the value list
+    other: bool  # ELSE
+    target: float | None  # New value; NaN for SYSMIS, None for COPY
+
+
+class SyntaxRun(NamedTuple):
+    """State after running a script"""
+    values: dict[str, np.ndarray]  # Variables created or changed by RECODE (float, NaN = SYSMIS)
+    variable_labels: dict[str, str]
+    value_labels: dict[str, dict[float, str]]
+    commands: int  # Commands executed
+
+
+class ColumnDiff(NamedTuple):
+    """A recoded question whose syntax result differs from apply_recodes"""
+    label: str  # Question text
+    target: str  # Variable the syntax writes, e.g. "Q12.r"
+    mismatches: int  # Rows that differ
+    examples: list[tuple[int, float | None, float | None]]  # (row, apply_recodes value, syntax value)
+
+
+class SyntaxCheck(NamedTuple):
+    """Column-by-column comparison of the syntax result with apply_recodes"""
+    compared: int  # Questions compared
+    diffs: list[ColumnDiff]
+    not_in_syntax: list[str]  # Questions apply_recodes recoded but the syntax never writes
+    not_in_recodes: list[str]  # Variables the syntax writes that apply_recodes has no column for
+
+    @property
+    def ok(self) -> bool:
+        return not (self.diffs or self.not_in_syntax or self.not_in_recodes)
+
+
+_TOKEN_RE = re.compile(r"""
+    (?P<space>[ \t\r]+)
+  | (?P<newline>\n)
+  | (?P<string>'(?:[^']|'')*'|"(?:[^"]|"")*")
+  | (?P<number>-?(?:\d+(?:\.\d+)?|\.\d+)(?:[eE][-+]?\d+)?)
+  | (?P<word>[A-Za-z@#$](?:[\w@#$]|\.(?=[\w@#$]))*)
+  | (?P<punct>[()=/,])
+  | (?P<dot>\.)
+""", re.VERBOSE)
+
+# A period ends a command only when nothing but blanks follows it on the line
+_TERMINATOR_RE = re.compile(r'[ \t\r]*(?:\n|$)')
+
+
+def _tokenize(script: str) -> list[list[_Token]]:
+    """Split a script into commands, each a list of tokens"""
+    commands: list[list[_Token]] = []
+    current: list[_Token] = []
+    line = 1
+    position = 0
+    while position < len(script):
+        match = _TOKEN_RE.match(script, position)
+        if match is None:
+            raise SpssSyntaxError(f"unexpected character {script[position]!r}", line)
+        kind = match.lastgroup
+        text = match.group()
+        position = match.end()
+        if kind == 'newline':
+            line += 1
+        elif kind == 'dot':
+            if not _TERMINATOR_RE.match(script, position):
+                raise SpssSyntaxError("period inside a command", line)
+            if current:
+                commands.append(current)
+            current = []
+        elif kind == 'string':
+            quote = text[0]
+            current.append(_Token('string', text[1:-1].replace(quote * 2, quote), line))
+            line += text.count('\n')
+        elif kind != 'space':
+            current.append(_Token(kind, text, line))
+    if current:
+        raise SpssSyntaxError("last command has no terminating period", current[-1].line)
+    return commands
+
+
+def _is_keyword(token: _Token, keyword: str) -> bool:
+    """SPSS keywords match in any case and may be cut to their first three letters"""
+    if token.kind != 'word':
+        return False
+    text = token.text.upper()
+    return text == keyword or (len(text) >= 3 and keyword.startswith(text))
+
+
+class _Tokens:
+    """Cursor over one command's tokens"""
+
+    def __init__(self, tokens: list[_Token]):
+        self._tokens = tokens
+        self._position = 0
+
+    def peek(self) -> _Token:
+        if self._position < len(self._tokens):
+            return self._tokens[self._position]
+        last = self._tokens[-1].line if self._tokens else None
+        return _Token('end', '', last)
+
+    def next(self) -> _Token:
+        token = self.peek()
+        self._position += 1
+        return token
+
+    def expect(self, kind: str, text: str | None = None) -> _Token:
+        token = self.next()
+        if token.kind != kind or (text is not None and token.text != text):
+            raise SpssSyntaxError(f"expected {text or kind}, found {token.text or 'end of command'!r}", token.line)
+        return token
+
+    def at(self, kind: str, text: str | None = None) -> bool:
+        token = self.peek()
+        return token.kind == kind and (text is None or token.text == text)
+
+
+class SpssRecodeInterpreter:
+    """
+    Runs RECODE, VARIABLE LABELS, VALUE LABELS and EXECUTE against a DataFrame.
+
+    Covers exactly what SPSSSyntaxGenerator writes: single- and multi-variable
+    RECODE with or without INTO, value lists with thru / LOWEST / HIGHEST /
+    SYSMIS / MISSING / ELSE, and numeric, SYSMIS or COPY targets. Every rule
+    is a NumPy mask over the whole column, applied first-match-wins as SPSS
+    does, so a script recoding hundreds of questions runs in well under a
+    second. Anything outside the subset raises SpssSyntaxError.
+
+    Example:
+        run = SpssRecodeInterpreter(catalog.df).run(result.script)
+        run.values["Q12.r"]          # array([1., 2., nan, ...])
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Args:
+            df: Survey DataFrame the syntax refers to (not modified)
+        """
+        self._df = df
+        # SPSS variable names are case-insensitive
+        self._df_columns = {str(column).upper(): column for column in df.columns}
+        self._values: dict[str, np.ndarray] = {}
+        self._names: dict[str, str] = {}  # Upper-case name -> name as first written
+        self._variable_labels: dict[str, str] = {}
+        self._value_labels: dict[str, dict[float, str]] = {}
+
+    def run(self, script: str) -> SyntaxRun:
+        """
+        Execute a script.
+
+        Returns:
+            SyntaxRun with every variable the script created or changed
+        """
+        commands = _tokenize(script)
+        for tokens in commands:
+            self._execute(_Tokens(tokens))
+        return SyntaxRun(
+            values={self._names[key]: values for key, values in self._values.items()},
+            variable_labels=dict(self._variable_labels),
+            value_labels={name: dict(labels) for name, labels in self._value_labels.items()},
+            commands=len(commands)
+        )
+
+    def _execute(self, tokens: _Tokens) -> None:
+        first = tokens.next()
+        if _is_keyword(first, 'RECODE'):
+            self._recode(tokens)
+        elif _is_keyword(first, 'VARIABLE') and _is_keyword(tokens.peek(), 'LABELS'):
+            tokens.next()
+            self._variable_labels_command(tokens)
+        elif _is_keyword(first, 'VALUE') and _is_keyword(tokens.peek(), 'LABELS'):
+            tokens.next()
+            self._value_labels_command(tokens)
+        elif _is_keyword(first, 'EXECUTE'):
+            if not tokens.at('end'):
+                raise SpssSyntaxError("EXECUTE takes no arguments", tokens.peek().line)
+        else:
+            raise SpssSyntaxError(f"unsupported command {first.text!r}", first.line)
+
+    # RECODE
+
+    def _recode(self, tokens: _Tokens) -> None:
+        while True:
+            sources = self._varlist(tokens)
+            if not sources:
+                raise SpssSyntaxError("RECODE needs a variable list", tokens.peek().line)
+            rules = []
+            while tokens.at('punct', '('):
+                rules.append(self._rule(tokens))
+            if not rules:
+                raise SpssSyntaxError("RECODE needs at least one (value=value) specification", tokens.peek().line)
+
+            targets = sources
+            if _is_keyword(tokens.peek(), 'INTO'):
+                tokens.next()
+                targets = self._varlist(tokens)
+                if len(targets) != len(sources):
+                    raise SpssSyntaxError(
+                        f"RECODE INTO names {len(targets)} targets for {len(sources)} variables",
+                        tokens.peek().line
+                    )
+
+            for source, target in zip(sources, targets):
+                self._apply_rules(source, target, rules)
+
+            if tokens.at('punct', '/'):
+                tokens.next()
+                continue
+            if not tokens.at('end'):
+                raise SpssSyntaxError(f"unexpected {tokens.peek().text!r} in RECODE", tokens.peek().line)
+            return
+
+    def _varlist(self, tokens: _Tokens) -> list[_Token]:
+        names = []
+        while tokens.at('word') and not _is_keyword(tokens.peek(), 'INTO'):
+            names.append(tokens.next())
+        return names
+
+    def _rule(self, tokens: _Tokens) -> _Rule:
+        tokens.expect('punct', '(')
+        intervals: list[tuple[float, float]] = []
+        sysmis = other = False
+        while not tokens.at('punct', '='):
+            token = tokens.peek()
+            if _is_keyword(token, 'SYSMIS') or _is_keyword(token, 'MISSING'):
+                tokens.next()
+                sysmis = True
+            elif _is_keyword(token, 'ELSE'):
+                tokens.next()
+                other = True
+            elif token.kind == 'punct' and token.text == ',':
+                tokens.next()
+            else:
+                low = self._bound(tokens, 'LOWEST', -np.inf)
+                high = low
+                if _is_keyword(tokens.peek(), 'THRU'):
+                    tokens.next()
+                    high = self._bound(tokens, 'HIGHEST', np.inf)
+                elif np.isinf(low):
+                    raise SpssSyntaxError("LOWEST/HIGHEST must be part of a thru range", token.line)
+                intervals.append((low, high))
+        tokens.expect('punct', '=')
+
+        token = tokens.next()
+        if token.kind == 'number':
+            target = float(token.text)
+        elif _is_keyword(token, 'SYSMIS'):
+            target = np.nan
+        elif _is_keyword(token, 'COPY'):
+            target = None
+        else:
+            raise SpssSyntaxError(f"invalid RECODE target {token.text!r}", token.line)
+        tokens.expect('punct', ')')
+        if not (intervals or sysmis or other):
+            raise SpssSyntaxError("empty value list in RECODE", token.line)
+        return _Rule(intervals, sysmis, other, target)
+
+    def _bound(self, tokens: _Tokens, keyword: str, infinity: float) -> float:
+        token = tokens.next()
+        if token.kind == 'number':
+            return float(token.text)
+        if _is_keyword(token, keyword) or token.text.upper() == keyword[:2]:
+            return infinity
+        raise SpssSyntaxError(f"expected a value, found {token.text or 'end of command'!r}", token.line)
+
+    def _apply_rules(self, source: _Token, target: _Token, rules: list[_Rule]) -> None:
+        values = self._source_values(source)
+        key = target.text.upper()
+        # A new INTO variable starts as SYSMIS; an existing one keeps unmatched values
+        existing = self._values.get(key)
+        if existing is None and key in self._df_columns:
+            existing = self._source_values(target)
+        result = existing.copy() if existing is not None else np.full(len(values), np.nan)
+
+        done = np.zeros(len(values), dtype=bool)
+        missing = np.isnan(values)
+        for rule in rules:
+            if rule.other:
+                mask = ~done
+            else:
+                mask = missing.copy() if rule.sysmis else np.zeros(len(values), dtype=bool)
+                for low, high in rule.intervals:
+                    mask |= (values >= low) & (values <= high)
+                mask &= ~done
+            if rule.target is None:
+                result[mask] = values[mask]
+            else:
+                result[mask] = rule.target
+            done |= mask
+
+        self._values[key] = result
+        self._names.setdefault(key, target.text)
+
+    def _source_values(self, name: _Token) -> np.ndarray:
+        """Current values of a variable as float (NaN = SYSMIS)"""
+        key = name.text.upper()
+        if key in self._values:
+            return self._values[key]
+        column = self._df_columns.get(key)
+        if column is None:
+            raise SpssSyntaxError(f"unknown variable {name.text!r}", name.line)
+        series = self._df[column]
+        if not pd.api.types.is_numeric_dtype(series.dtype):
+            raise SpssSyntaxError(f"{name.text!r} is a string variable; numeric RECODE needs a numeric one", name.line)
+        return series.to_numpy(dtype=float, na_value=np.nan)
+
+    # Labels
+
+    def _known(self, name: _Token) -> str:
+        key = name.text.upper()
+        if key not in self._values and key not in self._df_columns:
+            raise SpssSyntaxError(f"unknown variable {name.text!r}", name.line)
+        return self._names.get(key) or self._df_columns[key]
+
+    def _variable_labels_command(self, tokens: _Tokens) -> None:
+        while not tokens.at('end'):
+            name = self._known(tokens.expect('word'))
+            self._variable_labels[name] = tokens.expect('string').text
+            if tokens.at('punct', '/'):
+                tokens.next()
+
+    def _value_labels_command(self, tokens: _Tokens) -> None:
+        while not tokens.at('end'):
+            names = [self._known(name) for name in self._varlist(tokens)]
+            if not names:
+                raise SpssSyntaxError("VALUE LABELS needs a variable list", tokens.peek().line)
+            labels: dict[float, str] = {}
+            while tokens.at('number'):
+                value = float(tokens.next().text)
+                labels[value] = tokens.expect('string').text
+            for name in names:
+                self._value_labels[name] = dict(labels)
+            if tokens.at('punct', '/'):
+                tokens.next()
+            elif not tokens.at('end'):
+                raise SpssSyntaxError(f"unexpected {tokens.peek().text!r} in VALUE LABELS", tokens.peek().line)
+
+
+def _as_float(series: pd.Series) -> np.ndarray:
+    if not pd.api.types.is_numeric_dtype(series.dtype):
+        series = pd.to_numeric(series)
+    return series.to_numpy(dtype=float, na_value=np.nan)
+
+
+def compare_with_recodes(
+    run: SyntaxRun,
+    recoded_df: pd.DataFrame,
+    recode_settings: dict,
+    max_examples: int = 5
+) -> SyntaxCheck:
+    """
+    Diff the syntax result against the "Recode: <label>" columns of apply_recodes.
+
+    Each question's column from apply_recodes is compared with the "<column>.r"
+    variable the syntax writes for it; values match when equal or both missing.
+
+    Args:
+        run: SyntaxRun from SpssRecodeInterpreter.run
+        recoded_df: DataFrame returned by apply_recodes
+        recode_settings: The settings both were built from
+        max_examples: Differing rows kept per question
+
+    Returns:
+        SyntaxCheck listing differing, missing and unexpected columns
+    """
+    syntax_values = {name.upper(): values for name, values in run.values.items()}
+    diffs: list[ColumnDiff] = []
+    not_in_syntax: list[str] = []
+    expected_targets: set[str] = set()
+    compared = 0
+
+    for label, settings in recode_settings.items():
+        recode_column = f"Recode: {label}"
+        column = settings.get('column') or settings.get('matched_column')
+        if recode_column not in recoded_df.columns or not column:
+            continue
+        target = f"{column}.r"
+        expected_targets.add(target.upper())
+        actual = syntax_values.get(target.upper())
+        if actual is None:
+            not_in_syntax.append(label)
+            continue
+
+        compared += 1
+        expected = _as_float(recoded_df[recode_column])
+        differs = ~((expected == actual) | (np.isnan(expected) & np.isnan(actual)))
+        if differs.any():
+            rows = np.flatnonzero(differs)
+            diffs.append(ColumnDiff(
+                label=label,
+                target=target,
+                mismatches=len(rows),
+                examples=[
+                    (int(row),
+                     None if np.isnan(expected[row]) else float(expected[row]),
+                     None if np.isnan(actual[row]) else float(actual[row]))
+                    for row in rows[:max_examples]
+                ]
+            ))
+
+    not_in_recodes = [name for name in run.values if name.upper() not in expected_targets]
+    return SyntaxCheck(compared, diffs, not_in_syntax, not_in_recodes)
+
+
+def check_syntax(script: str, df: pd.DataFrame, recoded_df: pd.DataFrame, recode_settings: dict) -> SyntaxCheck:
+    """
+    Run generated syntax on the survey data and diff it against apply_recodes.
+
+    Args:
+        script: Syntax from SPSSSyntaxGenerator
+        df: Survey DataFrame (e.g. sav_data['catalog'].df)
+        recoded_df: apply_recodes(df, recode_settings)[0]
+        recode_settings: Per-question recode settings
+
+    Returns:
+        SyntaxCheck; raises SpssSyntaxError if the script does not parse or run
+    """
+    run = SpssRecodeInterpreter(df).run(script)
+    return compare_with_recodes(run, recoded_df, recode_settings)
@@ -0,0 +1,81 @@
+"""Streaming output for generated SPSS syntax"""
+import codecs
+import io
+from typing import TextIO
+
+
+class SyntaxWriter:
+    """
+    Collects SPSS syntax chunks as they are generated.
+
+    Chunks are written straight to a buffer: an in-memory io.BytesIO holding
+    the encoded script by default, or any open text file/stream passed in.
+    Appending a chunk costs only its own length, unlike growing one string
+    with +=, which copies the whole script for every recode block. The
+    in-memory buffer already holds the bytes a download needs, so serving
+    the script makes a single copy of it and never builds a str.
+
+    Example:
+        writer = SyntaxWriter()                      # in memory
+        with open("recode.sps", "w") as f:
+            generator.generate_recode_script(q1, q2, settings, writer=SyntaxWriter(f))
+    """
+
+    def __init__(self, stream: TextIO | None = None, encoding: str = 'utf-8'):
+        """
+        Args:
+            stream: Text stream to write to; None writes to an internal BytesIO
+            encoding: Encoding of the internal buffer
+        """
+        self._stream = stream
+        self._buffer = io.BytesIO() if stream is None else None
+        self._encoding = encoding
+        self.blocks = 0  # Chunks written
+        self.chars = 0  # Characters written
+
+    @property
+    def in_memory(self) -> bool:
+        """True if the syntax is held in an internal buffer that can be read back"""
+        return self._buffer is not None
+
+    def write(self, chunk: str) -> None:
+        if self._buffer is not None:
+            self._buffer.write(chunk.encode(self._encoding))
+        else:
+            self._stream.write(chunk)
+        self.blocks += 1
+        self.chars += len(chunk)
+
+    def getvalue(self) -> str:
+        """The whole script decoded (in-memory writers only); prefer to_bytes() for downloads"""
+        return self.to_bytes().decode(self._encoding)
+
+    def to_bytes(self) -> bytes:
+        """The whole encoded script for a download: one copy of the buffer (in-memory writers only)"""
+        self._require_memory()
+        return self._buffer.getvalue()
+
+    def preview(self, max_chars: int = 20_000) -> tuple[str, bool]:
+        """
+        The start of the script, cut at a line break, for display.
+
+        Only the bytes of the first max_chars characters are read from the
+        buffer, however long the script is.
+
+        Returns:
+            (preview text, True if the script was truncated)
+        """
+        self._require_memory()
+        # A character is at most 4 bytes in UTF-8; the decoder holds back a split last character
+        with self._buffer.getbuffer() as view:
+            head = bytes(view[:4 * (max_chars + 1)])
+        text = codecs.getincrementaldecoder(self._encoding)().decode(head)
+        if self.chars <= max_chars:
+            return text, False
+        text = text[:max_chars]
+        cut = text.rfind('\n')
+        return (text[:cut + 1] if cut > 0 else text), True
+
+    def _require_memory(self) -> None:
+        if not self.in_memory:
+            raise TypeError("SyntaxWriter output went to an external stream; read it from there")
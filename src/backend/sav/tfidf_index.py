@@ -0,0 +1,158 @@
+"""Sparse TF-IDF vectors of SAV labels for ranked column suggestions"""
+import re
+from collections import Counter
+from typing import NamedTuple
+import numpy as np
+from ..text_canonical import canonicalize
+
+
+_TOKEN_RE = re.compile(r'[0-9a-z]+')
+
+
+class LabelSuggestion(NamedTuple):
+    """A candidate column for an unmatched statement"""
+    column: str
+    label: str
+    score: float  # Cosine similarity from 0 to 1
+
+
+def _tokens(text: str) -> list[str]:
+    """Lowercase word tokens plus adjacent-word bigrams (bigrams keep some word order)"""
+    words = _TOKEN_RE.findall(canonicalize(text).lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class TfidfLabelIndex:
+    """
+    L2-normalised TF-IDF matrix over labels, stored sparse by term.
+
+    The label-term matrix is kept in compressed sparse column form: for each
+    term, the ids of the labels containing it (indices) and their weights
+    (data), sliced by indptr. Scoring a batch of statements is one sparse
+    product of the statements' term vectors with that matrix, done with
+    numpy gathers instead of a Python loop over labels.
+    """
+
+    def __init__(self, columns: list[str], labels: list[str]):
+        """
+        Args:
+            columns: Column names, one per label
+            labels: Label texts to index
+        """
+        self._columns = list(columns)
+        self._labels = list(labels)
+
+        label_counts = [Counter(_tokens(label)) for label in self._labels]
+        vocabulary: dict[str, int] = {}
+        document_frequency: list[int] = []
+        for counts in label_counts:
+            for term in counts:
+                term_id = vocabulary.setdefault(term, len(vocabulary))
+                if term_id == len(document_frequency):
+                    document_frequency.append(0)
+                document_frequency[term_id] += 1
+
+        n_labels = len(self._labels)
+        self._vocabulary = vocabulary
+        # Smoothed idf, as in scikit-learn: terms in every label still count a little
+        self._idf = np.log((1 + n_labels) / (1 + np.asarray(document_frequency, dtype=float))) + 1.0
+
+        label_ids: list[int] = []
+        term_ids: list[int] = []
+        weights: list[float] = []
+        for label_id, counts in enumerate(label_counts):
+            if not counts:
+                continue
+            ids = np.fromiter((vocabulary[t] for t in counts), dtype=np.int64, count=len(counts))
+            vector = (1.0 + np.log(np.fromiter(counts.values(), dtype=float, count=len(counts)))) * self._idf[ids]
+            vector /= np.linalg.norm(vector)
+            label_ids.extend([label_id] * len(ids))
+            term_ids.extend(ids.tolist())
+            weights.extend(vector.tolist())
+
+        label_ids_arr = np.asarray(label_ids, dtype=np.int64)
+        term_ids_arr = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids_arr, kind='stable')
+        self._indices = label_ids_arr[order]
+        self._data = np.asarray(weights, dtype=float)[order]
+        self._indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids_arr, minlength=len(vocabulary)), out=self._indptr[1:])
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def _query_vector(self, text: str) -> tuple[np.ndarray, np.ndarray]:
+        """Term ids and L2-normalised weights of a statement (unknown terms dropped)"""
+        counts = Counter(t for t in _tokens(text) if t in self._vocabulary)
+        if not counts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=float)
+        ids = np.fromiter((self._vocabulary[t] for t in counts), dtype=np.int64, count=len(counts))
+        vector = (1.0 + np.log(np.fromiter(counts.values(), dtype=float, count=len(counts)))) * self._idf[ids]
+        return ids, vector / np.linalg.norm(vector)
+
+    def scores(self, statements: list[str]) -> np.ndarray:
+        """
+        Cosine similarity of every statement with every label.
+
+        Returns:
+            Dense (len(statements), len(labels)) array
+        """
+        result = np.zeros((len(statements), len(self._labels)))
+        if not self._labels:
+            return result
+
+        query_rows: list[np.ndarray] = []
+        query_terms: list[np.ndarray] = []
+        query_weights: list[np.ndarray] = []
+        for row, statement in enumerate(statements):
+            ids, weights = self._query_vector(statement)
+            query_rows.append(np.full(len(ids), row, dtype=np.int64))
+            query_terms.append(ids)
+            query_weights.append(weights)
+        if not statements:
+            return result
+        rows = np.concatenate(query_rows)
+        terms = np.concatenate(query_terms)
+        weights = np.concatenate(query_weights)
+        if not len(terms):
+            return result
+
+        # Expand each (statement, term) pair into that term's postings
+        starts = self._indptr[terms]
+        lengths = self._indptr[terms + 1] - starts
+        total = int(lengths.sum())
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        out_rows = np.repeat(rows, lengths)
+        products = np.repeat(weights, lengths) * self._data[offsets]
+
+        flat = out_rows * len(self._labels) + self._indices[offsets]
+        result.ravel()[:] = np.bincount(flat, weights=products, minlength=result.size)
+        return result
+
+    def top_k(self, statements: list[str], k: int = 5, min_score: float = 0.0) -> list[list[LabelSuggestion]]:
+        """
+        Best-scoring labels for each statement.
+
+        Args:
+            statements: Statements to find candidates for
+            k: Suggestions per statement
+            min_score: Drop suggestions scoring below this
+
+        Returns:
+            For each statement, up to k suggestions, best first
+        """
+        scores = self.scores(statements)
+        k = min(k, len(self._labels))
+        suggestions: list[list[LabelSuggestion]] = []
+        for row in scores:
+            if k <= 0:
+                suggestions.append([])
+                continue
+            best = np.argpartition(-row, k - 1)[:k]
+            # Best first; ties go to the earlier label
+            best = best[np.lexsort((best, -row[best]))]
+            suggestions.append([
+                LabelSuggestion(self._columns[i], self._labels[i], float(row[i]))
+                for i in best if row[i] > 0 and row[i] >= min_score
+            ])
+        return suggestions
@@ -0,0 +1,39 @@
+"""Canonical form for text from PDFs and SAV labels, so both compare equal"""
+import unicodedata
+
+
+# Applied after NFKC, which already expands ligatures ("ﬁ" -> "fi") and turns
+# non-breaking and other fixed-width spaces into plain spaces
+_CANONICAL_TABLE = str.maketrans({
+    # Single quotes, apostrophes and primes
+    '‘': "'", '’': "'", '‚': "'", '‛': "'", '′': "'",
+    # Double quotes (NFKC has already split the double prime into two primes)
+    '“': '"', '”': '"', '„': '"', '‟': '"', '«': '"', '»': '"',
+    # Hyphens, dashes and the minus sign (NFKC maps the non-breaking hyphen to '‐')
+    '‐': '-', '‒': '-', '–': '-', '—': '-', '―': '-', '−': '-',
+    # Invisible characters PDFs leave inside words
+    '\u00ad': None,  # soft hyphen
+    '\u200b': None,  # zero-width space
+    '\u200c': None,  # zero-width non-joiner
+    '\u200d': None,  # zero-width joiner
+    '\u2060': None,  # word joiner
+    '\ufeff': None,  # byte order mark / zero-width no-break space
+})
+
+
+def canonicalize(text: str) -> str:
+    """
+    Canonical form of a statement or label.
+
+    NFKC normalisation followed by one str.translate pass that maps curly
+    quotes to straight ones, every dash to "-", and removes soft hyphens and
+    zero-width characters. Plain ASCII text is returned unchanged without
+    any work, so calling this on every string is cheap.
+
+    Example:
+        canonicalize("The defendant’s ﬁndings — “final”")
+        # 'The defendant\'s findings - "final"'
+    """
+    if text.isascii():
+        return text
+    return unicodedata.normalize('NFKC', text).translate(_CANONICAL_TABLE)
@@ -3,105 +3,70 @@ Applies recode settings to a SAV dataframe and generates a correlation table as
 Meant to be called after render_sav_processor() in main.py.
 """
 import io
+import os
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
 import pandas as pd
 import streamlit as st
+from src.backend.sav.correlation import correlation_matrix
+from src.backend.sav.recode_plan import (
+    as_int8_codes,
+    compile_recode_plan,
+    execute_recode_plan,
+    recode_settings_fingerprint
+)
+from src.backend.sav.sav_export import recoded_sav_bytes
 
 
-def _convert_value(value, settings: dict):
-    """
-    Apply recode logic to a single value based on its settings.
-    Handles NaN/missing values via sysmis_becomes if set.
-    Returns recoded integer (1 or 2), or None if value doesn't match or becomes is None.
-    """
-    variable_type = settings.get('variable_type', 'categorical')
-    sysmis_becomes = settings.get('sysmis_becomes')
-
-    if pd.isna(value):
-        return sysmis_becomes  # None if not set, or 1/2 if user mapped it
-
-    if variable_type == 'unknown':
-        return None
-
-    if variable_type == 'continuous':
-        op1 = settings['range1_operator']
-        val1 = settings['range1_value']
-        becomes1 = settings['range1_becomes']
-
-        if becomes1 is not None:
-            if   op1 == '<'  and value <  val1: return becomes1
-            elif op1 == '<=' and value <= val1: return becomes1
-            elif op1 == '='  and value == val1: return becomes1
-            elif op1 == '>=' and value >= val1: return becomes1
-            elif op1 == '>'  and value >  val1: return becomes1
-
-        op2 = settings['range2_operator']
-        val2 = settings['range2_value']
-        becomes2 = settings['range2_becomes']
-
-        if becomes2 is not None:
-            if   op2 == '<'  and value <  val2: return becomes2
-            elif op2 == '<=' and value <= val2: return becomes2
-            elif op2 == '='  and value == val2: return becomes2
-            elif op2 == '>=' and value >= val2: return becomes2
-            elif op2 == '>'  and value >  val2: return becomes2
-
-        return None
-
-    else:
-        r1_start = settings.get('range1_start')
-        r1_end = settings.get('range1_end')
-        r2_start = settings.get('range2_start')
-        r2_end = settings.get('range2_end')
-        r1_becomes = settings.get('range1_becomes')
-        r2_becomes = settings.get('range2_becomes')
+class CorrelationOutput(NamedTuple):
+    """Everything render_correlation_exporter shows for one SAV file and set of recode settings"""
+    recoded_df: pd.DataFrame  # apply_recodes frame
+    skipped: tuple[str, ...]  # Questions left out, with the reason
+    corr_matrix: pd.DataFrame  # Empty if nothing was recoded
+    excel: bytes  # Styled workbook; empty if corr_matrix is
 
-        if None not in (r1_start, r1_end) and r1_becomes is not None:
-            if r1_start <= value <= r1_end:
-                return r1_becomes
 
-        if None not in (r2_start, r2_end) and r2_becomes is not None:
-            if r2_start <= value <= r2_end:
-                return r2_becomes
+DEFAULT_CORRELATION_CACHE_BUDGET_MB = 256
 
-        return None
+# Pipeline outputs keyed by (SAV content key, recode settings fingerprint), shared by all
+# sessions, with the bytes each one holds
+_correlation_cache: OrderedDict[tuple[str, str], tuple[CorrelationOutput, int]] = OrderedDict()
+_correlation_cache_bytes = 0
+_correlation_lock = threading.Lock()
 
 
 def apply_recodes(df: pd.DataFrame, recode_settings: dict) -> tuple[pd.DataFrame, list[str]]:
     """
-    Apply all recode settings to the dataframe, adding Recode: columns.
-    Returns tuple of (recoded dataframe, list of skipped question labels).
-    """
-    df = df.copy()
-    skipped = []
-
-    for label, settings in recode_settings.items():
-        column = settings.get('column') or settings.get('matched_column')
-
-        if not column:
-            skipped.append(f"{label} (no SAV column matched)")
-            continue
-        if column not in df.columns:
-            skipped.append(f"{label} (column '{column}' not found in SAV)")
-            continue
-        if settings.get('variable_type') == 'unknown':
-            skipped.append(f"{label} (variable type could not be determined)")
-            continue
-        # Skip only if all three are None
-        if (settings.get('range1_becomes') is None and
-                settings.get('range2_becomes') is None and
-                settings.get('sysmis_becomes') is None):
-            skipped.append(f"{label} (all ranges set to None)")
-            continue
+    Apply all recode settings to the dataframe.
+    Returns tuple of (frame of "Recode: <label>" columns, list of skipped question labels).
 
-        df[f"Recode: {label}"] = df[column].apply(lambda x: _convert_value(x, settings))
-        print(f"value_counts: {df[f'Recode: {label}'].value_counts().to_dict()}")
+    The settings are compiled into a RecodePlan, the same one the SPSS syntax
+    is written from, so both give the same values.
 
+    Only the recoded columns are returned, as nullable Int8 (int8 codes plus
+    a missing mask) on the survey's own index; df is neither copied nor
+    modified, so the cost grows with the number of recodes, not the width of
+    the survey.
+    """
+    plan = compile_recode_plan(recode_settings)
+    recoded, skipped_rules = execute_recode_plan(plan, df)
 
-    return df, skipped
+    recoded_df = pd.DataFrame(
+        {f"Recode: {label}": as_int8_codes(values.to_numpy()) for label, values in recoded.items()},
+        index=df.index
+    )
+    skipped = [f"{label} ({reason})" for label, reason in skipped_rules]
+    return recoded_df, skipped
 
 
 def build_correlation_table(df: pd.DataFrame, recode_settings: dict) -> pd.DataFrame:
-    """Build a correlation matrix from all recoded label columns, deduplicating first."""
+    """
+    Build a correlation matrix from all recoded label columns, deduplicating first.
+
+    Uses correlation_matrix (matrix products over an int8 value matrix and
+    a validity mask), which gives the same values as DataFrame.corr().
+    """
     label_cols = list(dict.fromkeys([
         f"Recode: {label}" for label in recode_settings.keys()
         if f"Recode: {label}" in df.columns
@@ -110,7 +75,7 @@ def build_correlation_table(df: pd.DataFrame, recode_settings: dict) -> pd.DataF
     if not label_cols:
         return pd.DataFrame()
 
-    return df[label_cols].corr().abs()
+    return correlation_matrix(df[label_cols]).abs()
 
 
 def _write_styled_excel(corr_matrix: pd.DataFrame) -> io.BytesIO:
@@ -181,6 +146,120 @@ def _write_styled_excel(corr_matrix: pd.DataFrame) -> io.BytesIO:
     return buffer
 
 
+def _correlation_cache_budget() -> int:
+    """Bytes the correlation cache may hold, from CROSSTAB_CORRELATION_CACHE_BUDGET_MB (default 256)"""
+    return int(os.environ.get('CROSSTAB_CORRELATION_CACHE_BUDGET_MB', DEFAULT_CORRELATION_CACHE_BUDGET_MB)) * 1024 * 1024
+
+
+def _output_nbytes(output: CorrelationOutput) -> int:
+    return int(
+        output.recoded_df.memory_usage(deep=True).sum()
+        + output.corr_matrix.memory_usage(deep=True).sum()
+        + len(output.excel)
+    )
+
+
+def _output_view(output: CorrelationOutput) -> CorrelationOutput:
+    """
+    The output with shallow copies of its frames.
+
+    Under pandas copy-on-write a caller writing to a frame it was handed
+    copies the data first, so the cached frames never change.
+    """
+    return output._replace(
+        recoded_df=output.recoded_df.copy(deep=False),
+        corr_matrix=output.corr_matrix.copy(deep=False)
+    )
+
+
+def correlation_output(df: pd.DataFrame, recode_settings: dict, content_key: str | None = None) -> CorrelationOutput:
+    """
+    apply_recodes, build_correlation_table and _write_styled_excel, memoised.
+
+    Results are kept in a process-wide LRU keyed by the SAV's content key
+    and recode_settings_fingerprint(recode_settings), bounded by the bytes
+    of the frames and workbooks it holds (CROSSTAB_CORRELATION_CACHE_BUDGET_MB,
+    default 256). Reruns triggered by unrelated widgets then reuse the
+    workbook bytes, and so does every session with the same file and
+    settings. Each call gets its own shallow copies of the cached frames.
+
+    Args:
+        df: Survey DataFrame
+        recode_settings: Per-question recode settings
+        content_key: sav_data['content_key'] of the file df came from; None disables caching
+
+    Returns:
+        CorrelationOutput
+    """
+    global _correlation_cache_bytes
+    key = (content_key, recode_settings_fingerprint(recode_settings)) if content_key else None
+    if key is not None:
+        with _correlation_lock:
+            cached = _correlation_cache.get(key)
+            if cached is not None:
+                _correlation_cache.move_to_end(key)
+                return _output_view(cached[0])
+
+    recoded_df, skipped = apply_recodes(df, recode_settings)
+    corr_matrix = build_correlation_table(recoded_df, recode_settings)
+    excel = b'' if corr_matrix.empty else _write_styled_excel(corr_matrix).getvalue()
+    output = CorrelationOutput(recoded_df, tuple(skipped), corr_matrix, excel)
+
+    if key is not None:
+        nbytes = _output_nbytes(output)
+        budget = _correlation_cache_budget()
+        with _correlation_lock:
+            previous = _correlation_cache.pop(key, None)
+            if previous is not None:
+                _correlation_cache_bytes -= previous[1]
+            if nbytes <= budget:
+                _correlation_cache[key] = (output, nbytes)
+                _correlation_cache_bytes += nbytes
+            while _correlation_cache_bytes > budget:
+                _, (_, evicted) = _correlation_cache.popitem(last=False)
+                _correlation_cache_bytes -= evicted
+        output = _output_view(output)
+    return output
+
+
+def _source_columns(catalog, recode_settings: dict) -> list[str]:
+    """Columns of the recoded questions, in file order"""
+    used = {settings.get('column') or settings.get('matched_column') for settings in recode_settings.values()}
+    return [column for column in catalog.columns if column in used]
+
+
+def _render_sav_export(catalog, recoded_df: pd.DataFrame, recode_settings: dict):
+    """Offer the SAV file with the .r variables added, built only when asked for"""
+    with st.expander("💾 Recoded SAV file"):
+        st.caption(
+            "The survey data with every recoded question added as a .r variable, "
+            "labelled as the SPSS syntax would, so the syntax does not have to be run in SPSS."
+        )
+        columns = None
+        if not st.checkbox("Include every original variable", key="recoded_sav_all_columns"):
+            columns = st.multiselect(
+                "Original variables to include",
+                options=list(catalog.columns),
+                default=_source_columns(catalog, recode_settings),
+                key="recoded_sav_columns",
+                help="Written next to the .r variables; fewer variables make a smaller file that needs less memory to build"
+            )
+        if not st.button("Build recoded SAV", key="build_recoded_sav"):
+            return
+        with st.spinner("Writing SAV file..."):
+            data, export = recoded_sav_bytes(
+                catalog, recoded_df, recode_settings,
+                st.session_state.name1, st.session_state.name2,
+                columns
+            )
+        st.download_button(
+            label=f"📥 Download Recoded SAV ({len(export.recoded)} .r variables)",
+            data=data,
+            file_name="recoded.sav",
+            mime="application/octet-stream"
+        )
+
+
 def render_correlation_exporter():
     """
     Streamlit component that applies recodes, builds correlation table,
@@ -192,22 +271,21 @@ def render_correlation_exporter():
     if not sav_data or not recode_settings:
         return
 
-    df = sav_data['df']
+    df = sav_data['catalog'].df
 
     try:
-        recoded_df, skipped = apply_recodes(df, recode_settings)
-        corr_matrix = build_correlation_table(recoded_df, recode_settings)
+        # Recomputed only when the file or the recode settings change, not on every rerun
+        output = correlation_output(df, recode_settings, sav_data.get('content_key'))
+        recoded_df, skipped = output.recoded_df, output.skipped
 
-        if corr_matrix.empty:
+        if output.corr_matrix.empty:
             st.warning("⚠️ No recoded columns found to correlate.")
             return
 
-        buffer = _write_styled_excel(corr_matrix)
-
         st.subheader("📈 Correlation Table")
         st.download_button(
             label="📥 Download Correlation Table (.xlsx)",
-            data=buffer,
+            data=output.excel,
             file_name="correlation_table.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             type="primary"
@@ -218,6 +296,8 @@ def render_correlation_exporter():
                 for reason in skipped:
                     st.caption(f"• {reason}")
 
+        _render_sav_export(sav_data['catalog'], recoded_df, recode_settings)
+
     except Exception as e:
         st.error(f"❌ Error generating correlation table: {str(e)}")
         st.exception(e)
\ No newline at end of file
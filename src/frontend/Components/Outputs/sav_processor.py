@@ -1,6 +1,11 @@
 """SAV file processing UI component - UPDATED for refactored architecture"""
 import streamlit as st
 from src.backend.sav.spss_syntax import SPSSSyntaxGenerator, RecodeResult
+from src.backend.sav.syntax_interpreter import check_syntax, SpssSyntaxError
+from src.frontend.Components.Outputs.correlation_excel import correlation_output
+
+
+PREVIEW_CHARS = 20_000  # Syntax shown on the page; the download has all of it
 
 
 def render_sav_processor():
@@ -39,9 +44,17 @@ def _generate_and_display_syntax():
         # Get SAV data from session state
         sav_data = st.session_state.sav_data
         
+        consolidated = st.checkbox(
+            "Consolidated syntax (grouped RECODE, single EXECUTE)",
+            key="consolidated_syntax",
+            help="Groups questions with the same ranges into one RECODE command and "
+                 "ends with one EXECUTE, so SPSS passes over the data once. "
+                 "Much faster on large files."
+        )
+        
         # Create syntax generator with the NEW refactored class
         syntax_generator = SPSSSyntaxGenerator(
-            sav_labels=sav_data['sav_labels'],
+            sav_labels=sav_data['catalog'],
             name1=st.session_state.name1,
             name2=st.session_state.name2
         )
@@ -50,23 +63,27 @@ def _generate_and_display_syntax():
         result: RecodeResult = syntax_generator.generate_recode_script(
             name1_questions=st.session_state.name1_highlights,
             name2_questions=st.session_state.name2_highlights,
-            recode_settings=st.session_state.recode_settings
+            recode_settings=st.session_state.recode_settings,
+            consolidated=consolidated,
+            # Blocks survive reruns; only questions whose settings changed are rebuilt
+            block_cache=st.session_state.setdefault('syntax_block_cache', {})
         )
         
         # Display results
-        _display_results(result)
+        _display_results(result, syntax_generator)
         
     except Exception as e:
         st.error(f"❌ Error generating syntax: {str(e)}")
         st.exception(e)
 
 
-def _display_results(result: RecodeResult):
+def _display_results(result: RecodeResult, syntax_generator: SPSSSyntaxGenerator):
     """
     Display the processing results.
     
     Args:
         result: RecodeResult containing script and matches
+        syntax_generator: Generator that produced the result, used for suggestions
     """
     # Show statistics
     st.info(
@@ -74,38 +91,94 @@ def _display_results(result: RecodeResult):
         f"❌ Unmatched: {len(result.unmatched)} statements"
     )
     
-    # Display generated SPSS syntax
+    # Display generated SPSS syntax (only the start of long scripts)
     st.subheader("Generated SPSS Syntax")
-    st.code(result.script, language="sql")
+    preview, truncated = result.writer.preview(PREVIEW_CHARS)
+    st.code(preview, language="sql")
+    if truncated:
+        st.caption(
+            f"Showing the first {len(preview):,} of {result.writer.chars:,} characters "
+            f"({result.writer.blocks:,} recode blocks). Download the file for the full syntax."
+        )
     
-    # Download button
+    # Download button, served from the writer's buffer
     st.download_button(
         label="📥 Download SPSS Syntax",
-        data=result.script,
+        data=result.writer.to_bytes(),
         file_name="recode_syntax.sps",
         mime="text/plain",
         type="primary"
     )
     
+    _display_syntax_check(result)
+    
     # Display unmatched statements
     if result.unmatched:
-        _display_unmatched_statements(result.unmatched)
+        _display_unmatched_statements(result.unmatched, syntax_generator)
     
     # Optional: Show matched statements
     _display_matched_statements(result.matched)
 
 
-def _display_unmatched_statements(unmatched: list[tuple[str, str]]):
-    """Display statements that couldn't be matched"""
+def _display_syntax_check(result: RecodeResult):
+    """Run the syntax on the loaded data and compare it with the correlation recodes"""
+    with st.expander("🔍 Check syntax against the data"):
+        st.caption(
+            "Runs the generated RECODE syntax on the SAV data and compares every "
+            "recoded variable with the values used for the correlation table."
+        )
+        if not st.button("Run check", key="run_syntax_check"):
+            return
+        
+        sav_data = st.session_state.sav_data
+        df = sav_data['catalog'].df
+        recode_settings = st.session_state.recode_settings
+        try:
+            # The same cached recodes the correlation table uses
+            recoded_df = correlation_output(df, recode_settings, sav_data.get('content_key')).recoded_df
+            check = check_syntax(result.writer.getvalue(), df, recoded_df, recode_settings)
+        except SpssSyntaxError as e:
+            st.error(f"❌ The syntax would not run in SPSS: {e}")
+            return
+        
+        if check.ok:
+            st.success(f"✅ All {check.compared} recoded variables match")
+            return
+        
+        st.warning(f"⚠️ {len(check.diffs)} of {check.compared} recoded variables differ")
+        for diff in check.diffs:
+            st.write(f"`{diff.target}` — {diff.mismatches:,} rows differ: {diff.label}")
+            st.caption("; ".join(
+                f"row {row}: expected {expected}, syntax gives {actual}"
+                for row, expected, actual in diff.examples
+            ))
+        for label in check.not_in_syntax:
+            st.write(f"Not recoded by the syntax: {label}")
+        for target in check.not_in_recodes:
+            st.write(f"`{target}` is recoded by the syntax but not used for the correlation table")
+
+
+def _display_unmatched_statements(unmatched: list[tuple[str, str]], syntax_generator: SPSSSyntaxGenerator):
+    """Display statements that couldn't be matched, with the closest labels for each"""
     st.subheader("❌ Statements Not Found in SAV File")
     st.write(
         f"These {len(unmatched)} highlighted statements couldn't be matched "
         f"to any variable labels:"
     )
     
+    # One batched ranking call for every unmatched statement
+    suggestions = syntax_generator.suggest_columns([statement for _, statement in unmatched], k=5)
+    
     for side, statement in unmatched:
         with st.expander(f"[{side}] {statement[:80]}..."):
             st.write(statement)
+            candidates = suggestions.get(statement)
+            if candidates:
+                st.caption("Closest variable labels:")
+                for candidate in candidates:
+                    st.write(f"`{candidate.column}` ({candidate.score:.0%}) — {candidate.label}")
+            else:
+                st.caption("No similar variable labels found")
 
 
 def _display_matched_statements(matched: list[tuple[str, str]]):
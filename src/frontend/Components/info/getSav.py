@@ -3,7 +3,10 @@ import streamlit as st
 import pyreadstat
 import tempfile
 import os
-from src.backend.sav.spss_match_processor import SPSSMatchProcessor
+import io
+from src.backend.sav.spss_match_processor import SPSSMatchProcessor, rematch_recode_settings
+from src.backend.sav.sav_store import get_shared_sav_store
+from src.frontend.Components.user_recoding.recode_prepping import rebuild_recode_config
 
 
 def render_get_sav():
@@ -22,11 +25,76 @@ def render_get_sav():
 
     # A file is uploaded — process it only if it's new
     if st.session_state.sav_data is None or st.session_state.sav_data.get('file_id') != uploaded_sav.file_id:
+        previous = st.session_state.sav_data
         with st.spinner("Processing SAV file..."):
-            st.session_state.sav_data = SPSSMatchProcessor.get_essentials_from_sav(
-                uploaded_sav, st.session_state.name1, st.session_state.name2
-            )
-            st.session_state.sav_data['file_id'] = uploaded_sav.file_id
+            st.session_state.sav_data = _load_shared_sav(uploaded_sav)
             st.session_state.skip = False
 
-        st.success(f"SAV file uploaded: {uploaded_sav.name}")
\ No newline at end of file
+        st.success(f"SAV file uploaded: {uploaded_sav.name}")
+        _render_compaction_report(st.session_state.sav_data['catalog'].compaction)
+
+        # A new version of the file replaces one the recode settings were built on
+        if (previous is not None and st.session_state.recode_settings
+                and previous.get('content_key') != st.session_state.sav_data['content_key']):
+            with st.spinner("Updating matches for the new SAV version..."):
+                update = rematch_recode_settings(
+                    previous['catalog'],
+                    st.session_state.sav_data['catalog'],
+                    st.session_state.name1,
+                    st.session_state.name2,
+                    st.session_state.recode_settings,
+                    st.session_state.all_questions,
+                    rebuild_recode_config
+                )
+            _render_label_update(update)
+
+
+def _load_shared_sav(uploaded_sav) -> dict:
+    """
+    Get this session's sav_data from the process-wide SAV store.
+
+    Sessions that upload the same file share one parsed SavCatalog.
+    The lease stored in sav_data keeps the shared entry referenced; replacing
+    sav_data (or the session ending) releases it.
+    """
+    sav_bytes = uploaded_sav.getvalue()
+    lease = get_shared_sav_store().acquire(
+        sav_bytes,
+        lambda: SPSSMatchProcessor.get_essentials_from_sav(
+            io.BytesIO(sav_bytes), st.session_state.name1, st.session_state.name2
+        )
+    )
+    return {
+        'catalog': lease.catalog,
+        'name1': st.session_state.name1,
+        'name2': st.session_state.name2,
+        'file_id': uploaded_sav.file_id,
+        'content_key': lease.key,
+        'lease': lease
+    }
+
+
+def _render_label_update(update):
+    """Summarise how the new SAV version's labels differ and what was re-matched"""
+    diff = update.diff
+    if diff.is_empty:
+        st.caption("🔁 Variable labels unchanged; existing matches kept")
+        return
+    st.info(
+        f"🔁 New SAV version: {len(diff.added)} added, {len(diff.removed)} removed and "
+        f"{len(diff.changed)} relabelled variables"
+        f"{' (order changed)' if diff.reordered else ''}. "
+        f"Re-matched {len(update.rematched)} statements; the rest kept their matches."
+    )
+
+
+def _render_compaction_report(report):
+    """Show how much memory the dtype compaction saved for this SAV"""
+    if report is None or report.bytes_before == 0:
+        return
+    st.caption(
+        f"💾 Survey data held in {report.bytes_after / 1024 ** 2:.1f} MB "
+        f"(was {report.bytes_before / 1024 ** 2:.1f} MB, "
+        f"{report.bytes_before / max(report.bytes_after, 1):.1f}× smaller; "
+        f"{report.int8_columns} int8 and {report.categorical_columns} categorical columns)"
+    )
\ No newline at end of file
@@ -0,0 +1,125 @@
+"""Per-code (lookup) recode configuration shared by the recode configurators"""
+import streamlit as st
+from src.backend.sav.recode_plan import NEUTRAL_CODE, DEFAULT_OUTPUT_LABELS
+from src.frontend.Components.user_recoding.recode_prepping import _ranges_to_value_map
+
+
+def _neutral_label(settings: dict) -> str:
+    return (settings.get('output_labels') or {}).get(NEUTRAL_CODE, DEFAULT_OUTPUT_LABELS[NEUTRAL_CODE])
+
+
+def _output_options(settings: dict) -> list[tuple[int | None, str]]:
+    """Output codes a response code can map to, with their display names"""
+    return [
+        (1, st.session_state.name1),
+        (2, st.session_state.name2),
+        (NEUTRAL_CODE, _neutral_label(settings)),
+        (None, "None")
+    ]
+
+
+def _output_index(options: list[tuple[int | None, str]], value) -> int:
+    return next((i for i, (code, _) in enumerate(options) if code == value), len(options) - 1)
+
+
+def _render_lookup_toggle(settings: dict, codes: list, key: str, on_change=None, args: tuple = ()) -> bool:
+    """
+    Checkbox switching a categorical question between two ranges and a per-code mapping.
+
+    Turning it on starts the mapping from the current ranges.
+
+    Returns:
+        True if the question is in lookup mode
+    """
+    enabled = st.checkbox(
+        "Per-code mapping",
+        value=settings.get('recode_mode') == 'lookup',
+        key=key,
+        help=f"Map each response to {st.session_state.name1}, {st.session_state.name2}, "
+             f"{_neutral_label(settings)} or None instead of using two ranges",
+        on_change=on_change,
+        args=args
+    )
+    if enabled and settings.get('recode_mode') != 'lookup':
+        settings['value_map'] = _ranges_to_value_map(settings, codes)
+        settings['recode_mode'] = 'lookup'
+    elif not enabled and settings.get('recode_mode') == 'lookup':
+        settings['recode_mode'] = 'ranges'
+    return enabled
+
+
+def _render_lookup_config(
+    settings: dict,
+    codes: list,
+    labels: dict,
+    key_prefix: str,
+    on_change=None,
+    args: tuple = ()
+):
+    """
+    One Becomes dropdown per response code, then SYSMIS and a syntax preview.
+
+    While any code becomes NEUTRAL_CODE, a text box sets that code's value
+    label in the syntax and the SAV export (output_labels).
+
+    Args:
+        settings: The question's recode settings (value_map, sysmis_becomes
+            and output_labels are updated)
+        codes: Response codes to map, in display order
+        labels: Response code -> label text
+        key_prefix: Prefix for the widget keys
+        on_change: Optional widget callback
+        args: Arguments for on_change
+    """
+    options = _output_options(settings)
+    names = [name for _, name in options]
+    value_map = settings.setdefault('value_map', {})
+
+    st.write("**Response Codes:**")
+    for code in codes:
+        code = int(code) if float(code).is_integer() else code
+        col_code, col_becomes = st.columns([2, 1])
+        with col_code:
+            st.write(f"{code} - {labels.get(code, str(code))}")
+        with col_becomes:
+            selected = st.selectbox(
+                "Becomes", options=names,
+                index=_output_index(options, value_map.get(code)),
+                key=f"{key_prefix}_lookup_{code}",
+                label_visibility="collapsed",
+                on_change=on_change, args=args
+            )
+            value_map[code] = options[names.index(selected)][0]
+
+    st.write("**Missing Values (SYSMIS):**")
+    _, col_sysmis = st.columns([2, 1])
+    with col_sysmis:
+        selected = st.selectbox(
+            "Becomes", options=names,
+            index=_output_index(options, settings.get('sysmis_becomes')),
+            key=f"{key_prefix}_lookup_sysmis",
+            on_change=on_change, args=args
+        )
+        settings['sysmis_becomes'] = options[names.index(selected)][0]
+
+    if NEUTRAL_CODE in value_map.values() or settings['sysmis_becomes'] == NEUTRAL_CODE:
+        neutral_label = st.text_input(
+            f"Label for code {NEUTRAL_CODE}",
+            value=_neutral_label(settings),
+            key=f"{key_prefix}_lookup_label_{NEUTRAL_CODE}",
+            on_change=on_change, args=args
+        ).strip()
+        output_labels = settings.setdefault('output_labels', {})
+        if neutral_label and neutral_label != DEFAULT_OUTPUT_LABELS[NEUTRAL_CODE]:
+            output_labels[NEUTRAL_CODE] = neutral_label
+        else:
+            output_labels.pop(NEUTRAL_CODE, None)
+
+    groups: dict[int, list[str]] = {}
+    for code, becomes in sorted(value_map.items(), key=lambda item: float(item[0])):
+        if becomes is not None:
+            groups.setdefault(becomes, []).append(str(code))
+    specs = [f"({' '.join(group)}={becomes})" for becomes, group in groups.items()]
+    if settings.get('sysmis_becomes') is not None:
+        specs.append(f"(SYSMIS={settings['sysmis_becomes']})")
+    st.code(f"recode {' '.join(specs)}", language="sql")
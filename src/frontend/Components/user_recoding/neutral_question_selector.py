@@ -1,10 +1,11 @@
 """Neutral question selector component"""
 import streamlit as st
-import pandas as pd
 from src.frontend.Components.user_recoding.recode_prepping import (
+    _get_column_stats,
     _get_value_range,
     _create_recode_config
 )
+from src.frontend.Components.user_recoding.lookup_recode import _render_lookup_toggle, _render_lookup_config
 
 BECOMES_OPTIONS = lambda: [st.session_state.name1, st.session_state.name2, "None"]
 
@@ -47,6 +48,11 @@ def _render_neutral_question_config(label: str, settings: dict):
         if variable_type == 'continuous':
             _render_continuous_config(label, settings)
         elif variable_type == 'categorical':
+            codes = settings.get('original_values', [])
+            if _render_lookup_toggle(settings, codes, f"neutral_lookup_mode_{label}"):
+                stats = _get_column_stats(settings['matched_column'])
+                _render_lookup_config(settings, codes, stats.value_labels if stats is not None else {}, f"neutral_{label}")
+                return  # the lookup config has its own SYSMIS row
             _render_categorical_config(label, settings)
         else:
             st.warning("⚠️ Could not determine variable type")
@@ -114,8 +120,8 @@ def _render_continuous_config(label: str, settings: dict):
 def _render_categorical_config(label: str, settings: dict):
     """Render UI for categorical variables"""
     column = settings['matched_column']
-    meta = st.session_state.sav_data['meta']
-    value_labels = meta.variable_value_labels.get(column, {})
+    stats = _get_column_stats(column)
+    value_labels = stats.value_labels if stats is not None else {}
     original_values = settings.get('original_values', [])
     is_binary = len(original_values) == 2
 
@@ -206,9 +212,7 @@ def _render_neutral_question_selector():
     st.subheader("🔍 Select Neutral Questions")
     st.caption("Search and configure neutral/demographic questions for analysis")
 
-    columns = [column for column, label in st.session_state.sav_data['sav_labels']]
-    labels = [label for column, label in st.session_state.sav_data['sav_labels']]
-    df_labels = pd.DataFrame({"Column": columns, "Label": labels})
+    df_labels = st.session_state.sav_data['catalog'].label_frame
 
     search_input = st.text_input("Search questions", key="neutral_search_input", placeholder="Type to search labels...")
 
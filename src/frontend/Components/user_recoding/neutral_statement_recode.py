@@ -1,5 +1,6 @@
 """Recode settings neutral configuration component"""
 import streamlit as st
+from src.frontend.Components.user_recoding.recode_prepping import _get_column_stats, _get_value_range
 
 def _render_neutral_recode_configurator():
     """
@@ -13,7 +14,7 @@ def _render_neutral_recode_configurator():
         st.warning("⚠️ Please upload a SAV file first")
         return
     
-    all_questions = st.session_state.sav_data['sav_labels']
+    all_questions = st.session_state.sav_data['catalog']
     
     
     # Search bar - THAT'S IT, nothing else shows until you type
@@ -94,12 +95,8 @@ def _is_party_question(column: str, label: str) -> bool:
 
 def _add_neutral_question(column: str, label: str):
     """Add a neutral question to the selected list"""
-    meta = st.session_state.sav_data['meta']
-    
     # Get value range
-    values = None
-    if column in meta.variable_value_labels:
-        values = sorted(meta.variable_value_labels[column].keys())
+    values = _get_value_range(column)
     
     # Determine variable type
     is_continuous = (values is None)
@@ -242,9 +239,9 @@ def _render_binary_config(label: str, index: int, data: dict):
     """Render configuration for binary variables"""
     st.caption("📊 Binary variable")
     
-    meta = st.session_state.sav_data['meta']
     column = data['column']
-    value_labels = meta.variable_value_labels.get(column, {})
+    stats = _get_column_stats(column)
+    value_labels = stats.value_labels if stats is not None else {}
     codes = data['original_values']
     binary_map = data['binary_map']
     
@@ -1,5 +1,7 @@
 """Recode settings configuration component"""
 import streamlit as st
+from src.frontend.Components.user_recoding.recode_prepping import _get_column_stats
+from src.frontend.Components.user_recoding.lookup_recode import _render_lookup_toggle, _render_lookup_config
 
 BECOMES_OPTIONS = lambda: [st.session_state.name1, st.session_state.name2, "None"]
 
@@ -44,10 +46,17 @@ def _render_statement_config(statement: str, index: int, category: str, prefix:
         expanded=st.session_state[touched_key]
     ):
         st.write(f"**Full statement:** {statement}")
-        st.divider()
 
         settings = st.session_state.recode_settings[statement]
 
+        confidence = settings.get('match_confidence')
+        if confidence is not None and confidence < 1.0:
+            st.caption(
+                f"🔎 Approximate match to `{settings.get('matched_column')}` "
+                f"({confidence:.0%} similar) — check this is the right question"
+            )
+        st.divider()
+
         if 'changed_neutral' not in st.session_state:
             st.session_state.changed_neutral = []
         if 'sysmis_becomes' not in settings:
@@ -59,13 +68,12 @@ def _render_statement_config(statement: str, index: int, category: str, prefix:
         display_labels = {}
 
         if matched_column and st.session_state.sav_data:
-            meta = st.session_state.sav_data['meta']
-            df = st.session_state.sav_data['df']
-            value_labels = meta.variable_value_labels.get(matched_column, {})
-            original_values = sorted(value_labels.keys()) if value_labels else []
+            stats = _get_column_stats(matched_column)
+            value_labels = stats.value_labels if stats is not None else {}
+            original_values = list(stats.value_codes) if stats is not None and stats.value_codes else []
 
-            if matched_column in df.columns:
-                actual_responses = sorted(df[matched_column].dropna().unique().tolist())
+            if stats is not None:
+                actual_responses = list(stats.unique_values)
             else:
                 actual_responses = original_values
 
@@ -92,6 +100,16 @@ def _render_statement_config(statement: str, index: int, category: str, prefix:
         def val_to_idx(opts, target):
             return next((i for i, (v, _) in enumerate(opts) if v == target), 0)
 
+        if use_dropdowns and _render_lookup_toggle(
+            settings, display_values, f"{prefix}_lookup_mode_{index}",
+            on_change=_mark_touched, args=(touched_key,)
+        ):
+            _render_lookup_config(
+                settings, display_values, display_labels, f"{prefix}_{index}",
+                on_change=_mark_touched, args=(touched_key,)
+            )
+            return
+
         # ── First Range ──
         st.write("**First Range:**")
         col1, col2, col3 = st.columns(3)
@@ -3,6 +3,7 @@ import io
 import math
 from src.backend.file_extract.PDF_implementation import PDFHandler1
 from src.backend.sav.spss_match_processor import SPSSMatchProcessor
+from src.backend.sav.column_stats import ColumnStats
 
 
 def _render_recode_prepping(Q4_file):
@@ -37,21 +38,25 @@ def _render_recode_prepping(Q4_file):
     _initialize_recode_settings()
 
 
+def _get_column_stats(column_name) -> ColumnStats | None:
+    """Look up the statistics computed for a column when the SAV was loaded"""
+    return st.session_state.sav_data['catalog'].stats(column_name)
+
+
 def _get_value_range(column_name):
     """Extract the actual value range for a question from SAV metadata"""
-    meta = st.session_state.sav_data['meta']
-    if column_name in meta.variable_value_labels:
-        values = sorted(meta.variable_value_labels[column_name].keys())
-        return values
+    stats = _get_column_stats(column_name)
+    if stats is not None and stats.value_codes is not None:
+        return list(stats.value_codes)
     return None
 
 
 def _get_actual_values(column_name) -> list:
     """Get the actual unique values respondents used for a column from the dataframe"""
-    df = st.session_state.sav_data['df']
-    if column_name not in df.columns:
+    stats = _get_column_stats(column_name)
+    if stats is None:
         return []
-    return sorted(df[column_name].dropna().unique().tolist())
+    return list(stats.unique_values)
 
 
 def _resolve_ranges(values: list, actual_values: list) -> tuple[int, int, int, int]:
@@ -109,10 +114,29 @@ def _resolve_ranges(values: list, actual_values: list) -> tuple[int, int, int, i
     return range1_start, range1_end, range2_start, range2_end
 
 
+def _ranges_to_value_map(settings: dict, codes: list) -> dict:
+    """
+    Per-code lookup equivalent to a categorical config's two ranges.
+
+    Each code gets the output of the first range holding it, or None, so
+    switching a question to lookup mode starts from what it already does.
+    """
+    value_map = {}
+    for code in codes:
+        code = int(code) if float(code).is_integer() else code
+        value_map[code] = None
+        for prefix in ('range1', 'range2'):
+            start, end = settings.get(f'{prefix}_start'), settings.get(f'{prefix}_end')
+            if settings.get(f'{prefix}_becomes') is not None and None not in (start, end) and start <= code <= end:
+                value_map[code] = settings[f'{prefix}_becomes']
+                break
+    return value_map
+
+
 def _initialize_recode_settings():
     """Initialize recode settings for all statements"""
     processor = SPSSMatchProcessor(
-        sav_labels=st.session_state.sav_data['sav_labels'],
+        sav_labels=st.session_state.sav_data['catalog'],
         name1=st.session_state.name1,
         name2=st.session_state.name2
     )
@@ -121,13 +145,37 @@ def _initialize_recode_settings():
     _initialize_neutral_recodes(processor)
 
 
+def rebuild_recode_config(config: dict, column: str | None, confidence: float | None) -> dict:
+    """
+    Fresh recode settings for a party statement re-matched to another column.
+
+    Used as the rebuild callback of rematch_recode_settings when a new
+    version of the SAV file is uploaded.
+    """
+    favorable, unfavorable = (2, 1) if config['party'] == 'name1' else (1, 2)
+    return _create_recode_config(
+        party=config['party'],
+        matched_column=column,
+        values=_get_value_range(column) if column else None,
+        favorable_becomes=favorable,
+        unfavorable_becomes=unfavorable,
+        actual_values=_get_actual_values(column) if column else [],
+        match_confidence=confidence
+    )
+
+
 def _initialize_plaintiff_recodes(processor: SPSSMatchProcessor):
     """Initialize recode settings for plaintiff (name1) statements"""
     if not st.session_state.name1_highlights:
         return
+    new_statements = [
+        statement for statement in st.session_state.name1_highlights
+        if statement not in st.session_state.recode_settings
+    ]
+    matches = processor.match_many(new_statements)
     for statement in st.session_state.name1_highlights:
         if statement not in st.session_state.recode_settings:
-            matched_column = processor._find_column(statement)
+            matched_column = matches[statement]
             values = _get_value_range(matched_column) if matched_column else None
             actual_values = _get_actual_values(matched_column) if matched_column else []
             st.session_state.recode_settings[statement] = _create_recode_config(
@@ -136,7 +184,8 @@ def _initialize_plaintiff_recodes(processor: SPSSMatchProcessor):
                 values=values,
                 favorable_becomes=2,
                 unfavorable_becomes=1,
-                actual_values=actual_values
+                actual_values=actual_values,
+                match_confidence=processor.get_match_confidence(statement)
             )
 
 
@@ -144,9 +193,14 @@ def _initialize_defense_recodes(processor: SPSSMatchProcessor):
     """Initialize recode settings for defense (name2) statements"""
     if not st.session_state.name2_highlights:
         return
+    new_statements = [
+        statement for statement in st.session_state.name2_highlights
+        if statement not in st.session_state.recode_settings
+    ]
+    matches = processor.match_many(new_statements)
     for statement in st.session_state.name2_highlights:
         if statement not in st.session_state.recode_settings:
-            matched_column = processor._find_column(statement)
+            matched_column = matches[statement]
             values = _get_value_range(matched_column) if matched_column else None
             actual_values = _get_actual_values(matched_column) if matched_column else []
             st.session_state.recode_settings[statement] = _create_recode_config(
@@ -155,7 +209,8 @@ def _initialize_defense_recodes(processor: SPSSMatchProcessor):
                 values=values,
                 favorable_becomes=1,
                 unfavorable_becomes=2,
-                actual_values=actual_values
+                actual_values=actual_values,
+                match_confidence=processor.get_match_confidence(statement)
             )
 
 
@@ -188,7 +243,8 @@ def _create_recode_config(
     unfavorable_becomes: int,
     include_label: bool = False,
     label: str = None,
-    actual_values: list = None
+    actual_values: list = None,
+    match_confidence: float = None
 ) -> dict:
     """Create a recode configuration dictionary"""
     if actual_values is None:
@@ -206,6 +262,10 @@ def _create_recode_config(
         config['column'] = matched_column
         config['label'] = label
     
+    if match_confidence is not None:
+        # 1.0 for exact/substring matches, similarity score for fuzzy matches
+        config['match_confidence'] = match_confidence
+    
     if is_continuous:
         config.update({
             'variable_type': 'continuous',
@@ -251,7 +311,7 @@ def _create_recode_config(
             'range2_end': None,
             'range2_becomes': unfavorable_becomes
         })
-    
+
     return config
 
 